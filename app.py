@@ -2,111 +2,142 @@
 EarGuard - 音乐MV合规性检测工具
 Usage: python app.py
 """
-import gradio as gr
+import time
+from collections import deque
 from datetime import datetime
+from pathlib import Path
+
+import gradio as gr
 
-from config import SILICONFLOW_API_KEY, SILICONFLOW_VL_MODELS
-from services.siliconflow_api import SiliconFlowClient
-from services.report_generator import ReportGenerator
-from utils.file_utils import get_video_files, move_file, ensure_dir
+from config import (SILICONFLOW_API_KEY, SILICONFLOW_VL_MODELS, FAIL_FAST, METRICS_PORT, JOURNAL_RESUME, REPORT_FORMATS,
+                    UI_RECENT_ROWS, UI_REFRESH_INTERVAL, DISCOVERY_MAX_DEPTH, DISCOVERY_EXCLUDE, DISPOSITION_MODE)
+from services.compliance import MVComplianceChecker
+from services.report_generator import ReportWriter
+from services.pipeline import BatchPipeline
+from services.journal import get_journal
+from services.metrics import BatchMetrics, get_process_metrics, serve_prometheus
+from services.disposition import Disposer
+from utils.file_utils import VideoScan, source_folder
 from utils.profiles import load_profiles, save_profile, delete_profile, get_profile_choices
-from checkers import (
-    LyricistChecker,
-    AspectChecker,
-    ContentChecker,
-    NamingChecker,
-    DurationChecker,
-    ResolutionChecker,
-    StaticChecker,
-)
-
-
-class MVComplianceChecker:
-    """Main checker that runs all rules."""
-
-    def __init__(self, api_key: str, model: str = None):
-        client = SiliconFlowClient(api_key, model)
-        self.checkers = [
-            LyricistChecker(client),
-            AspectChecker(),
-            ContentChecker(client),
-            NamingChecker(client),
-            DurationChecker(client),
-            ResolutionChecker(),
-            StaticChecker(),
-        ]
-
-    def check_video(self, video_path: str) -> dict:
-        """Run all checks on a single video."""
-        violated = []
-        for checker in self.checkers:
-            result = checker.check(video_path)
-            if not result.passed:
-                violated.append(f"规则{result.rule_id}: {result.reason}")
-
-        is_compliant = len(violated) == 0
-        return ReportGenerator.create_result(
-            video_path,
-            is_compliant,
-            violated,
-            "; ".join(violated) if violated else "通过所有检测"
-        )
 
 
-def process_videos(input_path: str, compliant_path: str, non_compliant_path: str, api_key: str, model: str):
-    """Process videos and yield results in real-time."""
-    if not api_key:
-        yield "❌ 错误：请输入硅基流动API密钥", [], None
-        return
-    if not input_path:
-        yield "❌ 错误：请选择视频文件或文件夹", [], None
-        return
+class ResultView:
+    """Running counts plus bounded tails of the latest rows (all / failures only) for the results table.
 
-    videos = get_video_files(input_path)
-    if not videos:
-        yield "❌ 错误：未找到支持的视频文件(.ts, .mp4, .mkv)", [], None
-        return
-
-    # Setup directories (default to source dir if not specified)
-    from pathlib import Path
-    video_parent = Path(videos[0]).parent
-    comp_dir = ensure_dir(compliant_path) if compliant_path else ensure_dir(video_parent / "合规")
-    non_comp_dir = ensure_dir(non_compliant_path) if non_compliant_path else ensure_dir(video_parent / "不合规")
+    Each result costs O(1) and the table sent to the browser never exceeds
+    UI_RECENT_ROWS rows, however large the batch; the report file has them all.
+    The view lives in gr.State, so the failures-only toggle updates the mode
+    the running batch renders with.
+    """
 
-    checker = MVComplianceChecker(api_key, model)
-    results = []
-    total = len(videos)
+    def __init__(self, size: int = UI_RECENT_ROWS, failures_only: bool = False):
+        self.size = size
+        self.failures_only = failures_only
+        self.passed = 0
+        self.failed = 0
+        self._recent = deque(maxlen=size)
+        self._failures = deque(maxlen=size)
+
+    def add(self, result: dict):
+        ok = result["status"] == "合规"
+        row = [result["filename"], "✅ 合规" if ok else "❌ 不合规", result["violated_rules"], result["details"]]
+        self._recent.append(row)
+        if ok:
+            self.passed += 1
+        else:
+            self.failed += 1
+            self._failures.append(row)
 
-    for idx, video in enumerate(videos, 1):
-        result = checker.check_video(str(video))
-        results.append(result)
+    def rows(self, failures_only: bool = None) -> list[list]:
+        """Newest first, in the view's current mode unless given."""
+        if failures_only is None:
+            failures_only = self.failures_only
+        return list(reversed(self._failures if failures_only else self._recent))
 
-        # Move file based on result
-        if result["status"] == "合规":
-            move_file(str(video), str(comp_dir))
-        else:
-            move_file(str(video), str(non_comp_dir))
-        result["details"] += " [已移动]"
+    def caption(self) -> str:
+        total = self.passed + self.failed
+        return f"表格显示最近 {min(total, self.size)} 条，完整结果见报告" if total > self.size else ""
 
-        # Build real-time summary
-        passed = sum(1 for r in results if r["status"] == "合规")
-        failed = len(results) - passed
-        summary = f"⏳ 检测进度: {idx}/{total}\n\n📊 当前统计\n• 合规: {passed} 个 ✓\n• 不合规: {failed} 个 ✗"
 
-        # Build table
-        table_data = [[r["filename"], "✅ 合规" if r["status"] == "合规" else "❌ 不合规", r["violated_rules"], r["details"]] for r in results]
+def split_patterns(text: str) -> list[str]:
+    """Comma/newline separated glob patterns from a text field."""
+    return [p.strip() for p in (text or "").replace("\n", ",").split(",") if p.strip()]
 
-        yield summary, table_data, None
 
-    # Generate final report
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_path = f"检测报告_{timestamp}.csv"
-    ReportGenerator.generate_csv(results, report_path)
+def process_videos(input_path: str, compliant_path: str, non_compliant_path: str, api_key: str, model: str,
+                   fail_fast: bool = FAIL_FAST, resume: bool = JOURNAL_RESUME, failures_only: bool = False,
+                   include: str = "", exclude: str = "", max_depth: float = DISCOVERY_MAX_DEPTH,
+                   disposition: str = DISPOSITION_MODE):
+    """Process videos and yield results in real-time."""
+    if not api_key:
+        yield "❌ 错误：请输入硅基流动API密钥", [], None, None
+        return
+    if not input_path:
+        yield "❌ 错误：请选择视频文件或文件夹", [], None, None
+        return
 
-    passed = sum(1 for r in results if r["status"] == "合规")
-    final_summary = f"✅ 检测完成！\n\n📊 统计结果\n• 总计: {total} 个视频\n• 合规: {passed} 个 ✓\n• 不合规: {total - passed} 个 ✗\n\n📁 报告已保存: {report_path}"
+    # Output folders (default to the source folder) are never scanned, so moved files are not picked up again
+    comp_dir = Path(compliant_path) if compliant_path else source_folder(input_path) / "合规"
+    non_comp_dir = Path(non_compliant_path) if non_compliant_path else source_folder(input_path) / "不合规"
+
+    # Files stream into the pipeline while the tree is still being walked
+    videos = VideoScan(
+        input_path,
+        include=split_patterns(include),
+        exclude=[*DISCOVERY_EXCLUDE, *split_patterns(exclude)],
+        max_depth=None if max_depth is None or max_depth < 0 else int(max_depth),
+        skip_dirs=[comp_dir, non_comp_dir],
+    )
+    if not videos:
+        yield "❌ 错误：未找到支持的视频文件(.ts, .mp4, .mkv)", [], None, None
+        return
 
-    yield final_summary, table_data, report_path
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Report rows are streamed to disk as they finish, so a partial report survives a crash
+    try:
+        writer = ReportWriter(f"检测报告_{timestamp}.csv", REPORT_FORMATS)
+    except ValueError as e:
+        yield f"❌ 错误：{e}", [], None, None
+        return
+    disposer = Disposer(comp_dir, non_comp_dir, disposition,
+                        manifest=f"处置清单_{timestamp}.jsonl" if disposition == "manifest" else None)
+    pipeline = BatchPipeline(MVComplianceChecker(api_key, model, fail_fast=fail_fast), disposer,
+                             journal=get_journal(), resume=resume)
+    view = ResultView(failures_only=failures_only)
+    usage = BatchMetrics()
+
+    report_path = writer.paths.get("csv") or next(iter(writer.paths.values()), None)
+
+    last_update = 0.0
+    try:
+        for idx, result in enumerate(pipeline.run(videos), 1):
+            writer.write(result)
+            usage.add(result)
+            get_process_metrics().add(result)
+            view.add(result)
+
+            # Throttle browser updates; the final yield below always carries the last rows
+            now = time.monotonic()
+            if now - last_update < UI_REFRESH_INTERVAL:
+                continue
+            last_update = now
+            progress = f"{idx}/{videos.found}" if videos.finished else f"{idx}/{videos.found}+ (扫描中)"
+            summary = f"⏳ 检测进度: {progress}\n\n📊 当前统计\n• 合规: {view.passed} 个 ✓\n• 不合规: {view.failed} 个 ✗\n{usage.summary_line()}\n\n📁 实时报告: {report_path}"
+            yield summary, view.rows(), None, view
+    finally:
+        writer.close(usage.summary_line())
+        disposer.close()  # Wait for background cross-device moves
+
+    final_summary = f"✅ 检测完成！\n\n📊 统计结果\n• 总计: {view.passed + view.failed} 个视频\n• 合规: {view.passed} 个 ✓\n• 不合规: {view.failed} 个 ✗\n{usage.summary_line()}\n\n📁 报告已保存: {', '.join(writer.paths.values())}"
+    if view.caption():
+        final_summary += f"\n📋 {view.caption()}"
+    if disposer.manifest_path:
+        final_summary += f"\n📄 处置清单: {disposer.manifest_path}"
+    move_errors = pipeline.move_errors + disposer.errors
+    if move_errors:
+        final_summary += f"\n⚠️ {len(move_errors)} 个文件移动失败，重新检测时将再次处置:\n" + "\n".join(move_errors[:5])
+
+    yield final_summary, view.rows(), report_path, view
 
 
 def create_ui():
@@ -143,6 +174,13 @@ def create_ui():
         delete_profile(name)
         return gr.update(choices=get_profile_choices(), value=None), f"✅ 已删除"
 
+    def on_failures_only(view, only):
+        """Switch the table mode; a running batch keeps rendering in the new mode."""
+        if view is None:
+            return []
+        view.failures_only = only
+        return view.rows()
+
     with gr.Blocks(title="MVGuard - MV合规检测", css=custom_css) as app:
 
         # Header
@@ -184,8 +222,25 @@ def create_ui():
                     input_path = gr.Textbox(
                         label="📁 视频路径",
                         placeholder="/home/user/videos 或 /home/user/video.mp4",
-                        info="支持 .ts .mp4 .mkv 格式，可输入文件夹批量处理"
+                        info="支持 .ts .mp4 .mkv 格式，可输入文件夹批量处理（含子文件夹）"
                     )
+                    with gr.Accordion("🔎 扫描选项", open=False):
+                        include = gr.Textbox(
+                            label="包含",
+                            placeholder="*周杰伦*, 2024-*/*",
+                            info="只检测匹配的文件（按文件名或相对路径匹配，逗号分隔，不区分大小写）"
+                        )
+                        exclude = gr.Textbox(
+                            label="排除",
+                            placeholder="*_preview*, 待定",
+                            info="跳过匹配的文件或文件夹"
+                        )
+                        max_depth = gr.Number(
+                            label="子文件夹层数",
+                            value=DISCOVERY_MAX_DEPTH,
+                            precision=0,
+                            info="留空不限，0 = 仅当前文件夹"
+                        )
                     with gr.Row():
                         compliant_dir = gr.Textbox(
                             label="📂 合规文件目录",
@@ -195,6 +250,23 @@ def create_ui():
                             label="📂 不合规文件目录",
                             placeholder="留空则在源目录创建'不合规'文件夹",
                         )
+                    disposition = gr.Dropdown(
+                        label="📦 处置方式",
+                        choices=[("移动", "move"), ("硬链接（保留原文件）", "hardlink"),
+                                 ("软链接（保留原文件）", "symlink"), ("仅生成处置清单", "manifest")],
+                        value=DISPOSITION_MODE,
+                        info="跨磁盘移动在后台进行，不阻塞后续检测"
+                    )
+                    fail_fast = gr.Checkbox(
+                        label="⚡ 快速判定",
+                        value=FAIL_FAST,
+                        info="发现违规后跳过其余高成本检测(报告仅列出已发现的违规)"
+                    )
+                    resume = gr.Checkbox(
+                        label="♻️ 断点续检",
+                        value=JOURNAL_RESUME,
+                        info="复用中断前已完成的规则结果，已判定未移动的文件直接移动"
+                    )
 
                 btn = gr.Button("🚀 开始检测", variant="primary", size="lg")
 
@@ -221,9 +293,11 @@ def create_ui():
         gr.Markdown("### 📈 检测结果")
         summary = gr.Textbox(label="结果摘要", lines=6, show_label=False)
 
+        failures_only = gr.Checkbox(label="仅显示不合规", value=False)
+        view_state = gr.State(None)
         results_table = gr.Dataframe(
             headers=["文件名", "状态", "违规规则", "详情"],
-            label="详细结果",
+            label=f"详细结果（最近 {UI_RECENT_ROWS} 条，最新在前）",
             wrap=True,
             column_widths=["25%", "12%", "20%", "43%"]
         )
@@ -237,13 +311,21 @@ def create_ui():
 
         btn.click(
             fn=process_videos,
-            inputs=[input_path, compliant_dir, non_compliant_dir, api_key, model_select],
-            outputs=[summary, results_table, report_file]
+            inputs=[input_path, compliant_dir, non_compliant_dir, api_key, model_select, fail_fast, resume, failures_only,
+                    include, exclude, max_depth, disposition],
+            outputs=[summary, results_table, report_file, view_state]
+        )
+        failures_only.change(
+            on_failures_only,
+            inputs=[view_state, failures_only],
+            outputs=[results_table]
         )
 
     return app
 
 
 if __name__ == "__main__":
+    if METRICS_PORT:
+        serve_prometheus(METRICS_PORT)
     app = create_ui()
     app.launch(server_name="0.0.0.0", server_port=7860)
@@ -0,0 +1,4 @@
+"""Offline benchmarks: synthetic MVs, a mock SiliconFlow server and a runner.
+
+Usage: python -m benchmarks.run --workdir /tmp/mvguard-bench
+"""
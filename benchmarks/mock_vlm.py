@@ -0,0 +1,106 @@
+"""Local stand-in for the SiliconFlow chat completions API."""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockVLMServer:
+    """OpenAI-style /chat/completions server with injected latency and errors.
+
+    Replies are shaped to the prompt: JSON prompts get every key answered
+    (numbered mosaic cells true, other flags false), yes/no prompts get a
+    compliant answer. Counters cover requests, errors, images and bytes.
+    """
+
+    # Prompt marker -> compliant free-text reply; anything else gets "否"
+    REPLIES = [("'有'或'无'", "有"), ("无歌名", "无歌名"), ("的作品", "是")]
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockVLMServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        with self._lock:
+            self.stats = {"requests": 0, "errors": 0, "images": 0, "bytes": 0}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+    @staticmethod
+    def answer(prompt: str) -> str:
+        """Plausible compliant reply for a checker prompt."""
+        if "JSON" in prompt:
+            fmt = prompt[prompt.rfind("格式"):]
+            keys = dict.fromkeys(re.findall(r'"([^"]+)"\s*:', fmt))
+            return json.dumps({k: True if k.isdigit() else ("" if "说明" in k else False) for k in keys}, ensure_ascii=False)
+        for marker, reply in MockVLMServer.REPLIES:
+            if marker in prompt:
+                return reply
+        return "否"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(server.latency)
+                with server._lock:
+                    server.stats["requests"] += 1
+                    server.stats["bytes"] += len(body)
+                    failed = server._random.random() < server.error_rate
+                    if failed:
+                        server.stats["errors"] += 1
+                if failed:
+                    self._send(503, {"error": {"message": "mock overload"}})
+                    return
+
+                content = json.loads(body)["messages"][0]["content"]
+                parts = content if isinstance(content, list) else [{"type": "text", "text": content}]
+                with server._lock:
+                    server.stats["images"] += sum(1 for p in parts if p["type"] == "image_url")
+                prompt = next(p["text"] for p in parts if p["type"] == "text")
+                self._send(200, {"choices": [{"message": {"role": "assistant", "content": server.answer(prompt)}}]})
+
+            def _send(self, status: int, data: dict):
+                raw = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
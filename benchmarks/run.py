@@ -0,0 +1,172 @@
+"""Benchmark runner: per-checker latency, per-video throughput, API traffic and peak RSS.
+
+Runs fully offline: videos come from benchmarks.synthetic and VLM calls go to
+benchmarks.mock_vlm. Example:
+
+    python -m benchmarks.run --workdir /tmp/mvguard-bench --latency 0.3 --error-rate 0.05
+
+Each verdict is compared with synthetic.EXPECTED_VIOLATIONS; mismatches are
+listed and make the run exit 1.
+"""
+import argparse
+import json
+import re
+import resource
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from config import ENABLED_RULES
+from services.compliance import MVComplianceChecker
+from services.pipeline import BatchPipeline
+from .mock_vlm import MockVLMServer
+from .synthetic import CASES, EXPECTED_VIOLATIONS, generate
+
+
+def _timed(obj, attr: str, name: str, timings: dict):
+    """Replace obj.attr with a wrapper that appends each call's wall time to timings[name]."""
+    original = getattr(obj, attr)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            timings[name].append(time.perf_counter() - start)
+
+    setattr(obj, attr, wrapper)
+
+
+def instrument(checker: MVComplianceChecker) -> dict:
+    """Time every rule's check() plus the shared prechecks, media planning and fused requests."""
+    timings = defaultdict(list)
+    for c in checker.checkers:
+        _timed(c, "check", f"规则{c.rule_id} {type(c).__name__}", timings)
+    for attr in ("run_prechecks", "plan_media", "ask_fused"):
+        _timed(checker, attr, attr, timings)
+    return timings
+
+
+def peak_rss_mb() -> tuple[float, float]:
+    """Peak resident set size of this process and of its largest child (ffmpeg), in MB."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    child = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, child
+
+
+def as_expected(expected: set, violated: set, fail_fast: bool) -> bool:
+    """Whether a verdict matches the case; fail-fast may stop after the first expected violation."""
+    if fail_fast:
+        return violated <= expected and bool(violated) == bool(expected)
+    return violated == expected
+
+
+def run(args) -> dict:
+    videos = generate(args.workdir, duration=args.duration, cases=args.cases)
+
+    with MockVLMServer(latency=args.latency, error_rate=args.error_rate, seed=args.seed) as server:
+        checker = MVComplianceChecker("bench-key", fail_fast=args.fail_fast, rules=args.rules)
+        checker.client.base_url = server.url
+        checker.client.use_cache = False  # Every run pays for its requests
+        timings = instrument(checker)
+
+        # Sequential pass: per-video latency and API traffic
+        per_video = []
+        for path in videos:
+            server.reset()
+            start = time.perf_counter()
+            report = checker.check_video(path)
+            stats = server.snapshot()
+            expected = EXPECTED_VIOLATIONS.get(Path(path).stem, set()) & set(args.rules)
+            violated = {int(r) for r in re.findall(r"规则(\d+):", report["violated_rules"])}
+            per_video.append({
+                "video": report["filename"],
+                "seconds": round(time.perf_counter() - start, 3),
+                "status": report["status"],
+                "api_calls": stats["requests"],
+                "api_errors": stats["errors"],
+                "images": stats["images"],
+                "bytes_uploaded": stats["bytes"],
+                "violations": report["violated_rules"],
+                "expected": sorted(expected),
+                "as_expected": as_expected(expected, violated, args.fail_fast),
+            })
+        per_checker = {
+            name: {"calls": len(v), "mean": round(statistics.mean(v), 3), "max": round(max(v), 3), "total": round(sum(v), 3)}
+            for name, v in sorted(timings.items())
+        }
+
+        # Staged pipeline pass: batch throughput
+        server.reset()
+        start = time.perf_counter()
+        done = sum(1 for _ in BatchPipeline(checker).run(videos))
+        batch_seconds = time.perf_counter() - start
+        batch_stats = server.snapshot()
+
+    own_rss, child_rss = peak_rss_mb()
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "json"},
+        "per_video": per_video,
+        "mismatches": [v["video"] for v in per_video if not v["as_expected"]],
+        "per_checker": per_checker,
+        "batch": {
+            "videos": done,
+            "seconds": round(batch_seconds, 3),
+            "videos_per_minute": round(done / batch_seconds * 60, 2) if batch_seconds else 0,
+            "api_calls": batch_stats["requests"],
+            "bytes_uploaded": batch_stats["bytes"],
+        },
+        "peak_rss_mb": {"process": round(own_rss, 1), "largest_child": round(child_rss, 1)},
+    }
+
+
+def print_report(result: dict):
+    print(f"{'视频':<22}{'耗时(s)':>9}{'API调用':>9}{'图片':>6}{'上传(KB)':>10}  结果")
+    for v in result["per_video"]:
+        print(f"{v['video']:<22}{v['seconds']:>9.2f}{v['api_calls']:>9}{v['images']:>6}{v['bytes_uploaded'] / 1024:>10.1f}  "
+              f"{v['status']} {v['violations']}")
+    for v in result["per_video"]:
+        if not v["as_expected"]:
+            expected = ", ".join(f"规则{r}" for r in v["expected"]) or "合规"
+            print(f"⚠️ 结果与预期不符: {v['video']} 预期 {expected}, 实际 {v['status']} {v['violations']}")
+    if not result["mismatches"]:
+        print("✅ 全部结果符合预期")
+    print()
+    print(f"{'阶段/规则':<32}{'次数':>6}{'平均(s)':>9}{'最大(s)':>9}{'合计(s)':>9}")
+    for name, t in result["per_checker"].items():
+        print(f"{name:<32}{t['calls']:>6}{t['mean']:>9.3f}{t['max']:>9.3f}{t['total']:>9.3f}")
+    print()
+    b = result["batch"]
+    print(f"流水线: {b['videos']} 个视频 / {b['seconds']:.2f}s = {b['videos_per_minute']} 个/分钟, "
+          f"API调用 {b['api_calls']}, 上传 {b['bytes_uploaded'] / 1024:.1f} KB")
+    rss = result["peak_rss_mb"]
+    print(f"峰值内存: 进程 {rss['process']} MB, 子进程 {rss['largest_child']} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MVGuard offline benchmark")
+    parser.add_argument("--workdir", default="bench_videos", help="Where synthetic videos are generated/reused")
+    parser.add_argument("--duration", type=float, default=90, help="Seconds per synthetic video")
+    parser.add_argument("--cases", nargs="*", choices=list(CASES), help="Subset of synthetic cases")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock VLM latency per request (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock requests answered 503")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for injected errors")
+    parser.add_argument("--fail-fast", action="store_true", help="Benchmark fail-fast scheduling")
+    parser.add_argument("--rules", type=int, nargs="*", default=[*ENABLED_RULES, 3],
+                        help="Rules to run (default: ENABLED_RULES plus rule 3, which bench-spike exercises)")
+    parser.add_argument("--json", help="Also write the full result to this file")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 1 if result["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
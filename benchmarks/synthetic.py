@@ -0,0 +1,57 @@
+"""Synthetic test videos generated with ffmpeg lavfi sources."""
+import subprocess
+from pathlib import Path
+
+# Name -> (video source, audio source, container, extra output args)
+_TONE = "sine=f=440:sample_rate=44100,volume=0.3"
+# Game of life keeps changing everywhere, so motion cases do not read as static wallpapers
+_MOTION = ("life=size=320x180:rate=25:mold=10:ratio=0.5:death_color=#C83232:life_color=#00ff00,"
+           "scale={w}:{h}:flags=neighbor")
+
+CASES = {
+    "bench-480p": (_MOTION.format(w=854, h=480), _TONE, ".mp4", []),
+    "bench-720p": (_MOTION.format(w=1280, h=720), _TONE, ".mp4", []),
+    "bench-1080p": (_MOTION.format(w=1920, h=1080), _TONE, ".mp4", []),
+    "bench-mkv": (_MOTION.format(w=1280, h=720), _TONE, ".mkv", []),
+    "bench-ts": (_MOTION.format(w=1280, h=720), _TONE, ".ts", ["-c:v", "libx264", "-c:a", "aac", "-f", "mpegts"]),
+    "bench-vertical": (_MOTION.replace("320x180", "180x320").format(w=720, h=1280), _TONE, ".mp4", []),
+    "bench-letterbox": (_MOTION.replace("320x180", "320x75").format(w=1280, h=300) + ",pad=1280:720:0:210", _TONE, ".mp4", []),
+    "bench-static": ("color=c=navy:size=1280x720:rate=25,noise=alls=3:allf=t", _TONE, ".mp4", []),
+    "bench-spike": (_MOTION.format(w=1280, h=720),
+                    "sine=f=440:sample_rate=44100,volume='if(between(t,20,21),8,0.2)':eval=frame", ".mp4", []),
+}
+
+# Name -> rules the case must violate (any other violation is a benchmark mismatch)
+EXPECTED_VIOLATIONS = {
+    "bench-480p": {11},
+    "bench-720p": set(),
+    "bench-1080p": set(),
+    "bench-mkv": set(),
+    "bench-ts": set(),
+    "bench-vertical": {2},
+    "bench-letterbox": {2},
+    "bench-static": {12},
+    "bench-spike": {3},  # Rule 3 is off by default; benchmarks.run enables it
+}
+
+
+def generate(out_dir: str, duration: float = 90, cases: list[str] = None, force: bool = False) -> list[str]:
+    """Render the selected cases into out_dir (existing files are reused) and return their paths."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name in cases or list(CASES):
+        video, audio, ext, extra = CASES[name]
+        path = out / f"{name}{ext}"
+        if force or not path.exists():
+            cmd = [
+                "ffmpeg", "-y", "-v", "error",
+                "-f", "lavfi", "-i", video,
+                "-f", "lavfi", "-i", audio,
+                "-t", str(duration), "-pix_fmt", "yuv420p",
+                *(extra or ["-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac"]),
+                str(path),
+            ]
+            subprocess.run(cmd, check=True)
+        paths.append(str(path))
+    return paths
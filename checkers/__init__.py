@@ -1,21 +1,24 @@
+import importlib
 from .base import BaseChecker
-from .lyricist_checker import LyricistChecker
-from .aspect_checker import AspectChecker
-from .audio_checker import AudioChecker
-from .content_checker import ContentChecker
-from .naming_checker import NamingChecker
-from .duration_checker import DurationChecker
-from .resolution_checker import ResolutionChecker
-from .static_checker import StaticChecker
 
-__all__ = [
-    "BaseChecker",
-    "LyricistChecker",
-    "AspectChecker",
-    "AudioChecker",
-    "ContentChecker",
-    "NamingChecker",
-    "DurationChecker",
-    "ResolutionChecker",
-    "StaticChecker",
-]
+# Checker modules pull in OpenCV/NumPy or the HTTP client; import them on first access
+_LAZY = {
+    "LyricistChecker": ".lyricist_checker",
+    "AspectChecker": ".aspect_checker",
+    "AudioChecker": ".audio_checker",
+    "ContentChecker": ".content_checker",
+    "NamingChecker": ".naming_checker",
+    "DurationChecker": ".duration_checker",
+    "ResolutionChecker": ".resolution_checker",
+    "StaticChecker": ".static_checker",
+}
+
+__all__ = ["BaseChecker", *_LAZY]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
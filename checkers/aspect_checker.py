@@ -1,8 +1,9 @@
 import cv2
 import numpy as np
-from .base import BaseChecker, CheckResult
+from .base import BaseChecker, CheckResult, MediaNeeds, COST_LOCAL
 from services.video_processor import VideoProcessor
-from config import BLACK_BORDER_THRESHOLD, ASPECT_RATIO_VERTICAL
+from services.video_info import VideoInfo
+from config import ASPECT_RATIO_VERTICAL, BORDER_SAMPLE_COUNT, BORDER_DARK_LEVEL
 
 
 class AspectChecker(BaseChecker):
@@ -10,13 +11,25 @@ class AspectChecker(BaseChecker):
 
     rule_id = 2
     rule_name = "竖屏/黑边检测"
+    cost = COST_LOCAL
+    report_metrics = ("border_box",)
+
+    SCAN_SIZE = (640, 360)  # Borders are measured on downscaled frames
 
     def __init__(self):
         self.processor = VideoProcessor()
 
-    def check(self, video_path: str, **kwargs) -> CheckResult:
+    def precheck(self, video_path: str, info: VideoInfo) -> CheckResult | None:
+        if info.width and info.height and info.width / info.height < ASPECT_RATIO_VERTICAL:
+            return self._fail(f"竖屏视频 ({info.width}x{info.height})")
+        return None
+
+    def media_needs(self, video_path: str, info: VideoInfo) -> MediaNeeds:
+        return MediaNeeds(self.processor.even_timestamps(info.duration, BORDER_SAMPLE_COUNT), resolution=self.SCAN_SIZE)
+
+    def check(self, video_path: str, frames: list = None, **kwargs) -> CheckResult:
         info = self.processor.get_video_info(video_path)
-        width, height = info.get("width", 0), info.get("height", 0)
+        width, height = info.width, info.height
 
         if width == 0 or height == 0:
             return self._pass("无法获取视频尺寸")
@@ -26,57 +39,68 @@ class AspectChecker(BaseChecker):
             return self._fail(f"竖屏视频 ({width}x{height})")
 
         # Check black borders
-        frame = self.processor.extract_frame(video_path, info.get("duration", 0) / 2)
-        if frame is None:
+        if frames is None:
+            frames = [self.processor.extract_frame(video_path, t)
+                      for t in self.processor.even_timestamps(info.duration, BORDER_SAMPLE_COUNT)]
+            frames = [self.processor.fit_frame(f, self.SCAN_SIZE) if f is not None else None for f in frames]
+        box = self.border_box(frames)
+        if box is None:
             return self._pass()
 
-        result = self._check_black_borders(frame)
+        result = self._check_black_borders(box)
         if result:
-            return self._fail(result)
-
-        return self._pass()
-
-    def _check_black_borders(self, frame: np.ndarray) -> str | None:
+            result = self._fail(result)
+        else:
+            result = self._pass()
+        # Border box in source pixels: (top, bottom, left, right)
+        sy, sx = height / box[4], width / box[5]
+        result.metrics["border_box"] = (round(box[0] * sy), round(box[1] * sy), round(box[2] * sx), round(box[3] * sx))
+        return result
+
+    @staticmethod
+    def frame_borders(frame: np.ndarray, dark_level: int = BORDER_DARK_LEVEL) -> tuple[int, int, int, int] | None:
+        """Black border widths (top, bottom, left, right) of one frame, or None if it is all dark.
+
+        A row/column belongs to the border while over 90% of its pixels are
+        dark; row and column dark fractions come from one reduction each.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        dark = gray < dark_level
+        rows = dark.mean(axis=1) > 0.9
+        cols = dark.mean(axis=0) > 0.9
+        if rows.all():
+            return None  # Fade/black scene: says nothing about the borders
+        h, w = dark.shape
+
+        def run(mask):
+            """Length of the leading run of True values."""
+            return len(mask) if mask.all() else int(np.argmin(mask))
+
+        return (min(run(rows), h // 2), min(run(rows[::-1]), (h - 1) // 2),
+                min(run(cols), w // 2), min(run(cols[::-1]), (w - 1) // 2))
+
+    def border_box(self, frames: list) -> tuple | None:
+        """Median border box over frames, plus the (h, w) it was measured at.
+
+        Borders are fixed for the whole video while content changes, so the
+        median ignores dark scenes that would widen a single frame's box.
+        """
+        frames = [f for f in frames if f is not None]
+        boxes = [b for b in map(self.frame_borders, frames) if b is not None]
+        if not boxes:
+            return None
+        h, w = frames[0].shape[:2]
+        return (*(int(v) for v in np.median(np.array(boxes), axis=0)), h, w)
+
+    def _check_black_borders(self, box: tuple) -> str | None:
         """Check black borders: left/right >50% or top/bottom >50% is violation."""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        h, w = gray.shape
-        threshold = 15
-
-        # Check left/right borders (>50% total width = violation)
-        left_cols = 0
-        for i in range(w // 2):
-            if (gray[:, i] < threshold).mean() > 0.9:
-                left_cols += 1
-            else:
-                break
-
-        right_cols = 0
-        for i in range(w - 1, w // 2, -1):
-            if (gray[:, i] < threshold).mean() > 0.9:
-                right_cols += 1
-            else:
-                break
-
-        lr_ratio = (left_cols + right_cols) / w
+        top, bottom, left, right, h, w = box
+
+        lr_ratio = (left + right) / w
         if lr_ratio > 0.5:
             return f"左右黑边占比过大 ({lr_ratio:.0%})"
 
-        # Check top/bottom borders (>50% total height = violation)
-        top_rows = 0
-        for i in range(h // 2):
-            if (gray[i, :] < threshold).mean() > 0.9:
-                top_rows += 1
-            else:
-                break
-
-        bottom_rows = 0
-        for i in range(h - 1, h // 2, -1):
-            if (gray[i, :] < threshold).mean() > 0.9:
-                bottom_rows += 1
-            else:
-                break
-
-        tb_ratio = (top_rows + bottom_rows) / h
+        tb_ratio = (top + bottom) / h
         if tb_ratio > 0.5:
             return f"上下黑边占比过大 ({tb_ratio:.0%})"
 
@@ -1,7 +1,8 @@
 import numpy as np
-from .base import BaseChecker, CheckResult
+from .base import BaseChecker, CheckResult, MediaNeeds, COST_LOCAL
 from services.video_processor import VideoProcessor
-from config import AUDIO_SPIKE_THRESHOLD
+from services.video_info import VideoInfo
+from config import AUDIO_SPIKE_THRESHOLD, AUDIO_SPIKE_WINDOW, AUDIO_SPIKE_MIN_DB, AUDIO_CHUNK_DURATION
 
 
 class AudioChecker(BaseChecker):
@@ -9,27 +10,57 @@ class AudioChecker(BaseChecker):
 
     rule_id = 3
     rule_name = "音量突变检测"
+    cost = COST_LOCAL
 
     def __init__(self):
         self.processor = VideoProcessor()
 
-    def check(self, video_path: str, **kwargs) -> CheckResult:
-        levels = self.processor.extract_audio_levels(video_path)
+    def media_needs(self, video_path: str, info: VideoInfo) -> MediaNeeds:
+        return MediaNeeds(audio=True)
 
-        if len(levels) < 10:
+    def check(self, video_path: str, audio_levels: np.ndarray = None, **kwargs) -> CheckResult:
+        levels = audio_levels
+        if levels is None:
+            levels = self.processor.extract_audio_levels(video_path)
+        levels = np.asarray(levels, dtype=np.float64)
+
+        if np.isfinite(levels).sum() < 10:
             return self._pass("音频数据不足")
 
-        arr = np.array(levels)
-        mean, std = arr.mean(), arr.std()
+        spikes = self.find_spikes(levels)
+        if spikes:
+            shown = ", ".join(f"{int(t) // 60:02d}:{int(t) % 60:02d}" for t in spikes[:5])
+            more = "..." if len(spikes) > 5 else ""
+            return self._fail(f"检测到{len(spikes)}处音量突变 ({shown}{more})")
+
+        return self._pass()
 
-        if std == 0:
-            return self._pass()
+    @staticmethod
+    def find_spikes(levels: np.ndarray, window: int = AUDIO_SPIKE_WINDOW) -> list[float]:
+        """Start times (seconds) of windows deviating sharply from the trailing baseline.
 
-        # Detect spikes (values beyond threshold * std from mean)
-        spikes = np.abs(arr - mean) > AUDIO_SPIKE_THRESHOLD * std
+        The baseline is the mean/std of the previous `window` non-silent
+        windows, computed for all positions at once from cumulative sums.
+        Consecutive spike windows are reported as one event.
+        """
+        valid = np.isfinite(levels)
+        x = np.where(valid, levels, 0.0)
+        c1 = np.concatenate([[0.0], np.cumsum(x)])
+        c2 = np.concatenate([[0.0], np.cumsum(x * x)])
+        cn = np.concatenate([[0], np.cumsum(valid)])
 
-        if spikes.any():
-            spike_count = spikes.sum()
-            return self._fail(f"检测到{spike_count}处音量突变")
+        idx = np.arange(len(levels))
+        lo = np.maximum(0, idx - window)
+        count = cn[idx] - cn[lo]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = (c1[idx] - c1[lo]) / count
+            std = np.sqrt(np.maximum((c2[idx] - c2[lo]) / count - mean * mean, 0))
+            deviation = np.abs(x - mean)
+            spike = (
+                valid & (count >= max(2, window // 2))
+                & (deviation > AUDIO_SPIKE_THRESHOLD * std)
+                & (deviation >= AUDIO_SPIKE_MIN_DB)
+            )
 
-        return self._pass()
+        starts = np.flatnonzero(spike & ~np.concatenate([[False], spike[:-1]]))
+        return [float(i * AUDIO_CHUNK_DURATION) for i in starts]
@@ -1,5 +1,12 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from services.video_info import VideoInfo
+
+
+# Relative cost tiers, cheapest first
+COST_METADATA = 0  # ffprobe metadata only
+COST_LOCAL = 1  # Local decode / CPU analysis
+COST_VLM = 2  # Remote vision model calls
 
 
 @dataclass
@@ -9,6 +16,15 @@ class CheckResult:
     rule_name: str
     passed: bool
     reason: str = ""
+    metrics: dict = field(default_factory=dict)
+
+
+@dataclass
+class MediaNeeds:
+    """Media a checker needs decoded before check() is called."""
+    timestamps: list[float] = field(default_factory=list)
+    resolution: tuple[int, int] | None = None  # (max_w, max_h); None = native
+    audio: bool = False
 
 
 class BaseChecker(ABC):
@@ -16,12 +32,33 @@ class BaseChecker(ABC):
 
     rule_id: int = 0
     rule_name: str = ""
+    cost: int = COST_LOCAL
+    fused_group: str = ""  # Checkers sharing a group and frames can share one VLM request
+    report_metrics: tuple = ()  # result.metrics keys shown in the report's rule_metrics column
+    version: int = 1  # Bump when the detection logic changes, so journaled results are not reused
 
     @abstractmethod
     def check(self, video_path: str, **kwargs) -> CheckResult:
-        """Check video against this rule."""
+        """Check video against this rule.
+
+        When run through the frame planner, kwargs carry ``frames`` (one entry
+        per requested timestamp, None if undecodable) and ``audio_levels``;
+        after a fused request they also carry ``fused``, the parsed JSON answer.
+        """
         pass
 
+    def precheck(self, video_path: str, info: VideoInfo) -> CheckResult | None:
+        """Optional verdict from metadata alone; None means the full check must run."""
+        return None
+
+    def media_needs(self, video_path: str, info: VideoInfo) -> MediaNeeds | None:
+        """Declare frames/audio to pre-decode; None means the checker fetches its own."""
+        return None
+
+    def fused_section(self, video_path: str) -> tuple[str, str] | None:
+        """(JSON key, question) this checker contributes to a fused request."""
+        return None
+
     def _pass(self, reason: str = "") -> CheckResult:
         return CheckResult(self.rule_id, self.rule_name, True, reason)
 
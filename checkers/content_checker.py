@@ -1,7 +1,10 @@
-from .base import BaseChecker, CheckResult
+from .base import BaseChecker, CheckResult, MediaNeeds, COST_VLM
 from services.video_processor import VideoProcessor
+from services.video_info import VideoInfo
 from services.siliconflow_api import SiliconFlowClient
-from config import FRAME_SAMPLE_COUNT
+from services.fused_prompt import parse_json_response, as_bool
+from services.metrics import record
+from config import FRAME_SAMPLE_COUNT, MOSAIC_ENABLED, VLM_MAX_IMAGES
 
 
 class ContentChecker(BaseChecker):
@@ -10,18 +13,45 @@ class ContentChecker(BaseChecker):
     rule_id = 4
     rule_name = "内容合规检测"
 
+    CHECKS = [
+        ("暴露", "画面暴露"),
+        ("导向问题", "导向问题"),
+        ("纯风景", "仅风景画背景"),
+        ("吸毒", "含吸毒画面"),
+        ("非MV", "非音乐MV内容"),
+    ]
+    cost = COST_VLM
+
     def __init__(self, client: SiliconFlowClient = None):
         self.client = client or SiliconFlowClient()
         self.processor = VideoProcessor()
 
-    def check(self, video_path: str, **kwargs) -> CheckResult:
-        frames = self.processor.extract_frames(video_path, FRAME_SAMPLE_COUNT)
+    def media_needs(self, video_path: str, info: VideoInfo) -> MediaNeeds:
+        return MediaNeeds(self.processor.even_timestamps(info.duration, FRAME_SAMPLE_COUNT))
+
+    def check(self, video_path: str, frames: list = None, **kwargs) -> CheckResult:
+        if frames is None:
+            frames = self.processor.extract_frames(video_path, FRAME_SAMPLE_COUNT)
+        frames = [f for f in frames if f is not None]
         if not frames:
             return self._pass("无法提取帧")
 
-        images = [self.processor.frame_to_base64(f) for f in frames]
-
-        prompt = """请分析这些音乐MV画面（按顺序编号1-5），检查以下问题：
+        frames, dropped = self.processor.dedupe_frames(frames)
+        result = self._analyze(frames)
+        result.metrics["frames_deduped"] = dropped
+        record(frames_deduped=dropped)
+        return result
+
+    def _analyze(self, frames: list) -> CheckResult:
+        if len(frames) > 1 and (MOSAIC_ENABLED or len(frames) > VLM_MAX_IMAGES):
+            # One labelled grid per request slot so every sampled timestamp is seen
+            images = self.processor.frames_to_base64(self.processor.make_mosaic(frames), "mosaic")
+            layout = f"由{len(frames)}个画面拼接成的网格图（每格左上角标有编号1-{len(frames)}）"
+        else:
+            images = self.processor.frames_to_base64(frames, "scene")
+            layout = f"音乐MV画面（按顺序编号1-{len(images)}）"
+
+        prompt = f"""请分析这些{layout}，检查以下问题：
 1. 画面是否有暴露内容（如过度裸露、色情暗示）
 2. 画面是否有导向问题（如暴力、血腥、恐怖）
 3. 画面是否只有风景（如纯粹的山水、天空、花草，没有人物或其他内容）
@@ -29,15 +59,9 @@ class ContentChecker(BaseChecker):
 5. 画面是否有吸毒相关内容（如吸食毒品的动作、毒品道具）
 6. 这明显不是音乐MV（如电影片段、综艺节目、新闻、教程、游戏视频等非音乐MV内容）
 
-请按以下格式回答：
-暴露:是/否
-导向问题:是/否
-纯风景:是/否
-广告:是/否[如果是，说明：第X张，广告内容描述]
-吸毒:是/否
-非MV:是/否
-
-只需按格式回答，不要解释。"""
+请只输出一个JSON对象，不要解释，格式如下（是为true，否为false）：
+{{"暴露": false, "导向问题": false, "纯风景": false, "广告": false, "广告说明": "", "吸毒": false, "非MV": false}}
+其中"广告说明"仅在含广告时填写：第X张（编号），广告内容描述。"""
 
         try:
             response = self.client.analyze_images(images, prompt)
@@ -75,17 +99,24 @@ class ContentChecker(BaseChecker):
             return self._fail(violation)
 
     def _parse_response(self, response: str) -> CheckResult:
-        violations = []
+        data = parse_json_response(response)
+        if data is None:
+            return self._parse_text_response(response)
+
+        violations = [desc for keyword, desc in self.CHECKS if as_bool(data.get(keyword))]
+        if as_bool(data.get("广告")):
+            ad_detail = str(data.get("广告说明") or "").strip()
+            violations.append(f"含广告内容({ad_detail})" if ad_detail else "含广告内容")
+
+        if violations:
+            return self._fail(", ".join(violations))
+        return self._pass()
 
-        checks = [
-            ("暴露", "画面暴露"),
-            ("导向问题", "导向问题"),
-            ("纯风景", "仅风景画背景"),
-            ("吸毒", "含吸毒画面"),
-            ("非MV", "非音乐MV内容"),
-        ]
+    def _parse_text_response(self, response: str) -> CheckResult:
+        """Fallback for replies that ignore the JSON format ("暴露:是" lines)."""
+        violations = []
 
-        for keyword, desc in checks:
+        for keyword, desc in self.CHECKS:
             if f"{keyword}:是" in response or f"{keyword}：是" in response:
                 violations.append(desc)
 
@@ -1,6 +1,14 @@
-from .base import BaseChecker, CheckResult
+from .base import BaseChecker, CheckResult, MediaNeeds, COST_VLM
 from services.video_processor import VideoProcessor
+from services.video_info import VideoInfo
 from services.siliconflow_api import SiliconFlowClient
+from services.subtitle_detector import SubtitleDetector
+from services.fused_prompt import parse_json_response, as_bool
+from services.metrics import record
+from config import (
+    FRAME_DEDUP_DISTANCE, MOSAIC_ENABLED, MOSAIC_GRID,
+    LYRICS_SCAN_STEP, LYRICS_GAP_LIMIT,
+)
 
 
 class DurationChecker(BaseChecker):
@@ -8,39 +16,152 @@ class DurationChecker(BaseChecker):
 
     rule_id = 10
     rule_name = "时长/歌词检测"
+    cost = COST_VLM
 
     MAX_DURATION = 280  # 4min40s
-    LYRICS_CHECK_INTERVAL = 60  # Check every 60 seconds
+    EDGE_SKIP = 30  # Intro/outro seconds exempt from the lyrics check
+    SCAN_SIZE = (640, 360)  # Local detection runs on downscaled frames
+    MAX_CONFIRM_ROUNDS = 3
 
     def __init__(self, client: SiliconFlowClient = None):
         self.client = client or SiliconFlowClient()
         self.processor = VideoProcessor()
+        self.detector = SubtitleDetector()
 
-    def check(self, video_path: str, **kwargs) -> CheckResult:
+    def precheck(self, video_path: str, info: VideoInfo) -> CheckResult | None:
+        if info.duration > self.MAX_DURATION:
+            return self._fail(f"时长超过4分40秒 ({info.duration:.0f}秒)")
+        return None
+
+    def media_needs(self, video_path: str, info: VideoInfo) -> MediaNeeds:
+        duration = info.duration
+        if duration > self.MAX_DURATION or duration <= 60:
+            return MediaNeeds()
+        return MediaNeeds(self._lyrics_timestamps(duration), resolution=self.SCAN_SIZE)
+
+    def check(self, video_path: str, frames: list = None, **kwargs) -> CheckResult:
         info = self.processor.get_video_info(video_path)
-        duration = info.get("duration", 0)
+        duration = info.duration
 
         # Check duration
         if duration > self.MAX_DURATION:
             return self._fail(f"时长超过4分40秒 ({duration:.0f}秒)")
 
-        # Check lyrics presence (sample every 60s)
+        # Check lyrics continuity: scan locally, ask the VLM only where it matters
         if duration > 60:
-            no_lyrics_count = 0
-            for t in range(30, int(duration) - 30, 60):
-                frame = self.processor.extract_frame(video_path, t)
-                if frame is None:
-                    continue
-                img = self.processor.frame_to_base64(frame)
-                if not self._has_lyrics(img):
-                    no_lyrics_count += 1
-                    if no_lyrics_count >= 1:  # 1 minute without lyrics
-                        return self._fail("连续一分钟无歌词")
-                else:
-                    no_lyrics_count = 0
+            times = self._lyrics_timestamps(duration)
+            if frames is None:
+                frames = [self.processor.extract_frame(video_path, t) for t in times]
+                frames = [self.processor.fit_frame(f, self.SCAN_SIZE) if f is not None else None for f in frames]
+            return self._check_lyrics(times, frames)
 
         return self._pass()
 
+    def _check_lyrics(self, times: list[float], frames: list) -> CheckResult:
+        # Local verdicts: True/False when clear, None when ambiguous; undecodable counts as lyrics
+        states = [self.detector.classify(f) if f is not None else True for f in frames]
+        confirmed = set()  # Indexes whose state came from the VLM
+        deduped = 0  # Near-duplicate frames answered from an earlier verdict
+
+        def settled(gap):
+            """A gap is final once nothing in it is ambiguous and the VLM saw no lyrics in it."""
+            span = range(gap[0], gap[1] + 1)
+            return all(states[k] is not None for k in span) and any(k in confirmed and states[k] is False for k in span)
+
+        for _ in range(self.MAX_CONFIRM_ROUNDS):
+            open_gaps = [g for g in self._gaps(times, states) if not settled(g)]
+            # Resolve ambiguous frames that could complete a gap, and confirm purely
+            # local gaps by sampling their start, middle and end
+            pending = set()
+            for i, j in open_gaps:
+                span = range(i, j + 1)
+                pending.update(k for k in span if states[k] is None)
+                local = [k for k in span if states[k] is False and k not in confirmed]
+                if local and not any(k in confirmed and states[k] is False for k in span):
+                    pending.update({local[0], local[len(local) // 2], local[-1]})
+            if not pending:
+                break
+            pending = sorted(pending)
+            answers, dropped = self._ask_lyrics([frames[k] for k in pending])
+            deduped += dropped
+            for k, has in zip(pending, answers):
+                states[k] = has
+                confirmed.add(k)
+
+        gaps = [g for g in self._gaps(times, states) if settled(g)]
+        if gaps:
+            i, j = max(gaps, key=lambda g: times[g[1]] - times[g[0]])
+            length = times[j] - times[i] + LYRICS_SCAN_STEP
+            result = self._fail(f"连续{length:.0f}秒无歌词 ({times[i]:.0f}s-{times[j] + LYRICS_SCAN_STEP:.0f}s)")
+        else:
+            result = self._pass()
+        result.metrics["frames_scanned"] = len(frames)
+        result.metrics["frames_asked"] = len(confirmed)
+        result.metrics["frames_deduped"] = deduped
+        return result
+
+    def _gaps(self, times: list[float], states: list) -> list[tuple[int, int]]:
+        """Index ranges of consecutive samples without lyrics lasting at least LYRICS_GAP_LIMIT.
+
+        Ambiguous (None) samples count as without lyrics, so they are only
+        resolved when they could complete a violation.
+        """
+        gaps, start = [], None
+        for k, state in enumerate(states + [True]):
+            if state is True:
+                if start is not None and times[k - 1] - times[start] + LYRICS_SCAN_STEP >= LYRICS_GAP_LIMIT:
+                    gaps.append((start, k - 1))
+                start = None
+            elif start is None:
+                start = k
+        return gaps
+
+    def _lyrics_timestamps(self, duration: float) -> list[float]:
+        """Local scan points (every LYRICS_SCAN_STEP seconds, skipping intro/outro)."""
+        return list(range(self.EDGE_SKIP, int(duration) - self.EDGE_SKIP, LYRICS_SCAN_STEP))
+
+    def _ask_lyrics(self, frames: list) -> tuple[list[bool], int]:
+        """VLM lyrics verdict per frame, asking once per distinct frame; also the number of duplicates skipped."""
+        owners = self._duplicate_owners(frames)
+        distinct = sorted(set(owners))
+        if MOSAIC_ENABLED and len(distinct) > 1:
+            verdicts = dict(zip(distinct, self._has_lyrics_grid([frames[i] for i in distinct])))
+        else:
+            verdicts = {i: self._has_lyrics(self.processor.frame_to_base64(frames[i], "scene")) for i in distinct}
+        record(frames_deduped=len(owners) - len(distinct))
+        return [verdicts[o] for o in owners], len(owners) - len(distinct)
+
+    def _duplicate_owners(self, frames: list) -> list[int]:
+        """For each frame, the index of the first near-identical frame (itself if new)."""
+        hashes = [self.processor.dhash(f) for f in frames]
+        owners, distinct = [], []
+        for i, h in enumerate(hashes):
+            owner = next((j for j in distinct if self.processor.hash_distance(h, hashes[j]) <= FRAME_DEDUP_DISTANCE), None)
+            if owner is None:
+                owner = i
+                distinct.append(i)
+            owners.append(owner)
+        return owners
+
+    def _has_lyrics_grid(self, frames: list) -> list[bool]:
+        """Ask about many frames at once via numbered mosaics (one request per grid)."""
+        per_grid = MOSAIC_GRID[0] * MOSAIC_GRID[1]
+        answers = []
+        for n, mosaic in enumerate(self.processor.make_mosaic(frames)):
+            first = n * per_grid + 1
+            last = min(len(frames), first + per_grid - 1)
+            example = ", ".join(f'"{i}": true' for i in range(first, last + 1))
+            prompt = f"""这张图由多个视频画面拼接成网格，每格左上角标有编号{first}-{last}。
+请分别判断每个编号格的画面底部或画面中是否有歌词字幕。
+只输出JSON，有为true，无为false，格式：{{{example}}}"""
+            try:
+                data = parse_json_response(self.client.analyze_images([self.processor.frame_to_base64(mosaic, "mosaic")], prompt)) or {}
+            except:
+                data = {}
+            # Missing cells or errors: assume lyrics, as for single-frame errors
+            answers += [as_bool(data.get(str(i), True)) for i in range(first, last + 1)]
+        return answers
+
     def _has_lyrics(self, image: str) -> bool:
         """Check if frame has lyrics/subtitles."""
         prompt = "这张图片底部或画面中是否有歌词字幕？只回答'有'或'无'。"
@@ -1,6 +1,8 @@
-from .base import BaseChecker, CheckResult
+from .base import BaseChecker, CheckResult, MediaNeeds, COST_VLM
 from services.video_processor import VideoProcessor
+from services.video_info import VideoInfo
 from services.siliconflow_api import SiliconFlowClient
+from services.fused_prompt import as_bool
 
 
 class LyricistChecker(BaseChecker):
@@ -8,14 +10,29 @@ class LyricistChecker(BaseChecker):
 
     rule_id = 1
     rule_name = "林夕作词作曲检测"
+    cost = COST_VLM
+    fused_group = "opening"
 
     def __init__(self, client: SiliconFlowClient = None):
         self.client = client or SiliconFlowClient()
         self.processor = VideoProcessor()
 
-    def check(self, video_path: str, **kwargs) -> CheckResult:
+    def media_needs(self, video_path: str, info: VideoInfo) -> MediaNeeds:
+        return MediaNeeds(self.processor.first_timestamps(seconds=10, count=3))
+
+    def fused_section(self, video_path: str) -> tuple[str, str]:
+        return "linxi_credit", '画面中显示的作词或作曲人是否为"林夕"（true/false，没有作词作曲信息则为false）'
+
+    def check(self, video_path: str, frames: list = None, fused: dict = None, **kwargs) -> CheckResult:
+        if fused is not None and "linxi_credit" in fused:
+            if as_bool(fused["linxi_credit"]):
+                return self._fail("检测到林夕作词/作曲")
+            return self._pass()
+
         # Extract frames from first 10 seconds
-        frames = self.processor.extract_first_frames(video_path, seconds=10, count=3)
+        if frames is None:
+            frames = self.processor.extract_first_frames(video_path, seconds=10, count=3)
+        frames = [f for f in frames if f is not None]
         if not frames:
             return self._pass("无法提取帧")
 
@@ -24,7 +41,7 @@ class LyricistChecker(BaseChecker):
 如果没有看到林夕的名字，或者没有作词作曲信息，请回答"否"。
 只需回答"是"或"否"。"""
 
-        images = [self.processor.frame_to_base64(f) for f in frames]
+        images = self.processor.frames_to_base64(frames, "ocr")
 
         try:
             response = self.client.analyze_images(images, prompt)
@@ -1,7 +1,8 @@
 import re
 from pathlib import Path
-from .base import BaseChecker, CheckResult
+from .base import BaseChecker, CheckResult, MediaNeeds, COST_VLM
 from services.video_processor import VideoProcessor
+from services.video_info import VideoInfo
 from services.siliconflow_api import SiliconFlowClient
 
 
@@ -10,28 +11,41 @@ class NamingChecker(BaseChecker):
 
     rule_id = 8
     rule_name = "文件命名检测"
+    cost = COST_VLM
+    fused_group = "opening"
 
     def __init__(self, client: SiliconFlowClient = None):
         self.client = client or SiliconFlowClient()
         self.processor = VideoProcessor()
 
-    def check(self, video_path: str, **kwargs) -> CheckResult:
-        filename = Path(video_path).stem
+    def media_needs(self, video_path: str, info: VideoInfo) -> MediaNeeds:
+        return MediaNeeds(self.processor.first_timestamps(seconds=10, count=3))
 
-        # Parse format: "artist：song" or "artist-song"
-        match = re.match(r"^(.+?)[：:-](.+)$", filename)
-        if not match:
-            return self._fail(f"文件名格式不符合'歌手名-歌曲名': {filename}")
+    def fused_section(self, video_path: str) -> tuple[str, str] | None:
+        if not self._parse_filename(video_path):
+            return None
+        return "song_title", "MV开头画面中显示的歌曲名称（字符串，没有显示歌名则为null）"
 
-        artist, song = match.groups()
-        artist, song = artist.strip(), song.strip()
+    def check(self, video_path: str, frames: list = None, fused: dict = None, **kwargs) -> CheckResult:
+        parsed = self._parse_filename(video_path)
+        if not parsed:
+            return self._fail(f"文件名格式不符合'歌手名-歌曲名': {Path(video_path).stem}")
+        artist, song = parsed
+
+        if fused is not None and "song_title" in fused:
+            title = fused["song_title"]
+            if title and not isinstance(title, bool) and song.lower() not in str(title).lower():
+                return self._fail(f"MV显示歌名与文件名不一致: {title}")
+            return self._check_ownership(artist, song)
 
         # Extract frames from beginning
-        frames = self.processor.extract_first_frames(video_path, seconds=10, count=3)
+        if frames is None:
+            frames = self.processor.extract_first_frames(video_path, seconds=10, count=3)
+        frames = [f for f in frames if f is not None]
         if not frames:
             return self._check_ownership(artist, song)
 
-        images = [self.processor.frame_to_base64(f) for f in frames]
+        images = self.processor.frames_to_base64(frames, "ocr")
 
         # Step 1: Check if MV shows song title
         prompt1 = f"""查看这些MV开头画面，是否显示了歌曲名称？
@@ -52,6 +66,15 @@ class NamingChecker(BaseChecker):
         except Exception as e:
             return self._pass(f"API调用失败: {e}")
 
+    @staticmethod
+    def _parse_filename(video_path: str) -> tuple[str, str] | None:
+        """Split "artist：song" or "artist-song" into (artist, song)."""
+        match = re.match(r"^(.+?)[：:-](.+)$", Path(video_path).stem)
+        if not match:
+            return None
+        artist, song = match.groups()
+        return artist.strip(), song.strip()
+
     def _check_ownership(self, artist: str, song: str) -> CheckResult:
         """Check if song belongs to the artist."""
         prompt = f"""请判断歌曲《{song}》是否为歌手"{artist}"的作品？
@@ -1,5 +1,5 @@
-from .base import BaseChecker, CheckResult
-from services.video_processor import VideoProcessor
+from .base import BaseChecker, CheckResult, COST_METADATA
+from services.video_info import VIDEO_INFO_CACHE
 
 
 class ResolutionChecker(BaseChecker):
@@ -7,16 +7,14 @@ class ResolutionChecker(BaseChecker):
 
     rule_id = 11
     rule_name = "清晰度检测"
+    cost = COST_METADATA
 
     MIN_HEIGHT = 720  # 超清标准
 
-    def __init__(self):
-        self.processor = VideoProcessor()
-
     def check(self, video_path: str, **kwargs) -> CheckResult:
-        info = self.processor.get_video_info(video_path)
-        height = info.get("height", 0)
-        width = info.get("width", 0)
+        info = VIDEO_INFO_CACHE.get(video_path)  # Metadata only: no OpenCV needed
+        height = info.height
+        width = info.width
 
         if height == 0:
             return self._pass("无法获取分辨率")
@@ -1,7 +1,12 @@
 import cv2
 import numpy as np
-from .base import BaseChecker, CheckResult
+from .base import BaseChecker, CheckResult, MediaNeeds, COST_LOCAL
 from services.video_processor import VideoProcessor
+from services.video_info import VideoInfo
+from config import (
+    STATIC_PROFILE_FPS, STATIC_MOTION_THRESHOLD, STATIC_SEGMENT_RATIO,
+    STATIC_LOOP_DIFF, STATIC_LOOP_MIN,
+)
 
 
 class StaticChecker(BaseChecker):
@@ -9,21 +14,88 @@ class StaticChecker(BaseChecker):
 
     rule_id = 12
     rule_name = "静态画面检测"
+    cost = COST_LOCAL
+    report_metrics = ("static_ratio", "loop_period")
+    version = 2
 
     SIMILARITY_THRESHOLD = 0.95  # 95% similar = static
+    LOOP_WINDOW = 600  # Profile frames searched for a loop (5 min at 2 fps)
 
     def __init__(self):
         self.processor = VideoProcessor()
 
-    def check(self, video_path: str, **kwargs) -> CheckResult:
+    def media_needs(self, video_path: str, info: VideoInfo) -> MediaNeeds | None:
+        # The motion profile is decoded by its own low-res ffmpeg pass
+        return None
+
+    def check(self, video_path: str, frames: list = None, **kwargs) -> CheckResult:
         info = self.processor.get_video_info(video_path)
-        duration = info.get("duration", 0)
+        duration = info.duration
         if duration < 30:
             return self._pass()
 
-        # Sample frames at different points
-        timestamps = [duration * i / 6 for i in range(1, 6)]
-        frames = [self.processor.extract_frame(video_path, t) for t in timestamps]
+        if frames is None:
+            profile = self.processor.extract_gray_profile(video_path)
+            if len(profile) >= 3:
+                return self._check_profile(profile)
+
+            # Fall back to sampling frames at different points
+            timestamps = [duration * i / 6 for i in range(1, 6)]
+            frames = [self.processor.extract_frame(video_path, t) for t in timestamps]
+        return self._check_samples(frames)
+
+    def _check_profile(self, profile: np.ndarray) -> CheckResult:
+        """Judge the whole-video motion profile: static share and loops.
+
+        The sampled-frame similarity test of _check_samples is not reused here:
+        area-averaged profile frames differ far less than full frames, so its
+        threshold would flag ordinary motion as static.
+        """
+        x = profile.reshape(len(profile), -1).astype(np.float32) / 255
+        motion = np.abs(np.diff(x, axis=0)).mean(axis=1)
+        static_ratio = float((motion < STATIC_MOTION_THRESHOLD).mean())
+        period = self._loop_period(x[:self.LOOP_WINDOW])
+
+        if static_ratio >= STATIC_SEGMENT_RATIO:
+            result = self._fail("画面长时间无变化(动态壁纸)")
+        elif period is not None:
+            result = self._fail(f"画面循环播放(动态壁纸, 周期约{period:.0f}秒)")
+        else:
+            result = self._pass()
+        result.metrics["static_ratio"] = round(static_ratio, 3)
+        result.metrics["motion_energy"] = round(float(motion.mean()), 4)
+        result.metrics["loop_period"] = period
+        return result
+
+    def _loop_period(self, x: np.ndarray) -> float | None:
+        """Shortest period (seconds) after which the moving picture repeats, if any.
+
+        Pairwise RMS differences come from one Gram matrix; they are averaged
+        per lag, and a loop is a lag whose frames match while the frames in
+        between do not (otherwise the picture is simply static).
+        """
+        n = len(x)
+        min_lag = max(1, int(STATIC_LOOP_MIN * STATIC_PROFILE_FPS))
+        max_lag = n // 3  # Require at least three repetitions
+        if max_lag <= min_lag:
+            return None
+
+        sq = (x * x).sum(axis=1)
+        d2 = np.maximum(sq[:, None] + sq[None, :] - 2 * (x @ x.T), 0) / x.shape[1]
+        i, j = np.triu_indices(n, 1)
+        keep = j - i <= max_lag
+        lag, dist = (j - i)[keep], np.sqrt(d2[i[keep], j[keep]])
+        per_lag = np.bincount(lag, weights=dist, minlength=max_lag + 1) / np.maximum(np.bincount(lag, minlength=max_lag + 1), 1)
+
+        for L in range(min_lag, max_lag + 1):
+            if per_lag[L] < STATIC_LOOP_DIFF and per_lag[1:L].max() > 2 * STATIC_LOOP_DIFF:
+                while L < max_lag and per_lag[L + 1] < per_lag[L]:
+                    L += 1
+                return L / STATIC_PROFILE_FPS
+        return None
+
+    def _check_samples(self, frames: list) -> CheckResult:
+        """Legacy check: compare a few sampled frames."""
         frames = [f for f in frames if f is not None]
 
         if len(frames) < 3:
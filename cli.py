@@ -0,0 +1,181 @@
+"""
+MVGuard - 命令行批量检测（无界面，适合定时任务/容器）
+Usage: python cli.py /path/to/videos [--rules 2,10,11] [--report out/报告] [--workers vlm=8]
+       python cli.py /path/to/inbox --watch [--interval 2] [--settle 5]
+
+Exit codes: 0 全部检测完成, 1 存在检测出错或移动失败的视频, 2 参数或环境错误
+"""
+import argparse
+import os
+import signal
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from config import (SILICONFLOW_VL_MODELS, ENABLED_RULES, FAIL_FAST, CHECKER_CONCURRENCY,
+                    REPORT_FORMATS, PIPELINE_WORKERS, DISCOVERY_MAX_DEPTH, DISCOVERY_EXCLUDE,
+                    WATCH_INTERVAL, WATCH_SETTLE, DISPOSITION_MODE, DISPOSITION_IO_WORKERS)
+
+
+def parse_workers(values: list[str]) -> dict:
+    """["vlm=8", "decode=1"] -> {"vlm": 8, "decode": 1}."""
+    workers = {}
+    for value in values:
+        stage, sep, count = value.partition("=")
+        if not sep or stage not in PIPELINE_WORKERS or not count.isdigit():
+            raise argparse.ArgumentTypeError(f"无效的 --workers 参数: {value} (可选阶段: {', '.join(PIPELINE_WORKERS)})")
+        workers[stage] = int(count)
+    return workers
+
+
+def print_move_errors(disposer, shown: int) -> int:
+    """Print background move failures not printed yet; returns how many are printed so far."""
+    errors = disposer.errors[shown:] if disposer else []
+    for error in errors:
+        print(f"⚠️ 文件移动失败 {error}", file=sys.stderr, flush=True)
+    return shown + len(errors)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mvguard", description="音乐MV合规性批量检测")
+    parser.add_argument("input", help="视频文件或文件夹（含子文件夹）")
+    parser.add_argument("--include", action="append", default=[], metavar="PATTERN",
+                        help="只检测匹配的文件（按文件名或相对路径匹配，不区分大小写，可重复）")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN", help="跳过匹配的文件或文件夹（可重复）")
+    parser.add_argument("--max-depth", type=int, default=DISCOVERY_MAX_DEPTH, help="子文件夹层数（0 = 仅当前文件夹，默认不限）")
+    parser.add_argument("--compliant-dir", help="合规文件目录（默认：源目录下'合规'）")
+    parser.add_argument("--non-compliant-dir", help="不合规文件目录（默认：源目录下'不合规'）")
+    parser.add_argument("--watch", action="store_true", help="持续监控文件夹，新文件复制完成后自动检测（Ctrl-C 停止）")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="监控模式扫描间隔（秒）")
+    parser.add_argument("--settle", type=float, default=WATCH_SETTLE, help="监控模式下文件大小/修改时间稳定多久后检测（秒）")
+    parser.add_argument("--no-move", action="store_true", help="只检测并生成报告，不移动文件")
+    parser.add_argument("--disposition", choices=("move", "hardlink", "symlink", "manifest"), default=DISPOSITION_MODE,
+                        help="处置方式：移动 / 硬链接 / 软链接（保留原文件）/ 仅生成处置清单")
+    parser.add_argument("--manifest", help="处置清单路径（JSONL；manifest 模式默认：报告路径.manifest.jsonl）")
+    parser.add_argument("--io-workers", type=int, default=DISPOSITION_IO_WORKERS, help="跨磁盘后台移动/复制并发数")
+    parser.add_argument("--report", help="报告路径（不含扩展名，默认：检测报告_时间戳）")
+    parser.add_argument("--formats", default=",".join(REPORT_FORMATS), help="报告格式，逗号分隔: csv,jsonl,parquet")
+    parser.add_argument("--rules", default=",".join(map(str, ENABLED_RULES)), help="启用的规则编号，逗号分隔")
+    parser.add_argument("--workers", nargs="*", default=[], metavar="STAGE=N",
+                        help=f"各阶段并发数，阶段: {', '.join(PIPELINE_WORKERS)}")
+    parser.add_argument("--concurrency", type=int, default=CHECKER_CONCURRENCY, help="单个视频内规则并发数")
+    parser.add_argument("--fail-fast", action="store_true", default=FAIL_FAST, help="发现违规后跳过其余高成本检测")
+    parser.add_argument("--no-resume", action="store_true", help="忽略中断前的检测记录，全部重新检测")
+    parser.add_argument("--api-key", default=os.getenv("SILICONFLOW_API_KEY", ""), help="硅基流动API密钥（默认读取环境变量）")
+    parser.add_argument("--model", default=SILICONFLOW_VL_MODELS[0], help="视觉模型")
+    parser.add_argument("--quiet", action="store_true", help="不逐条输出结果")
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    # Heavy modules (OpenCV, HTTP client) load only with the rules that need them
+    from checkers.base import COST_VLM
+    from services.compliance import CHECKER_REGISTRY, MVComplianceChecker, load_checker_class
+    from services.journal import get_journal
+    from services.metrics import BatchMetrics
+    from services.pipeline import BatchPipeline
+    from services.report_generator import ReportWriter
+    from services.disposition import Disposer
+    from utils.file_utils import VideoScan, source_folder
+
+    try:
+        rules = sorted({int(r) for r in args.rules.split(",") if r.strip()})
+        workers = parse_workers(args.workers)
+    except (ValueError, argparse.ArgumentTypeError) as e:
+        print(f"❌ 参数错误: {e}", file=sys.stderr)
+        return 2
+    unknown = [r for r in rules if r not in CHECKER_REGISTRY]
+    if unknown:
+        print(f"❌ 未知规则: {unknown} (可选: {sorted(CHECKER_REGISTRY)})", file=sys.stderr)
+        return 2
+    if not args.api_key and any(load_checker_class(r).cost >= COST_VLM for r in rules):
+        print("❌ 错误：启用的规则需要硅基流动API密钥 (--api-key 或 SILICONFLOW_API_KEY)", file=sys.stderr)
+        return 2
+
+    # Output folders are never scanned, so moved files are not picked up again
+    comp_dir = Path(args.compliant_dir) if args.compliant_dir else source_folder(args.input) / "合规"
+    non_comp_dir = Path(args.non_compliant_dir) if args.non_compliant_dir else source_folder(args.input) / "不合规"
+    scan_options = dict(include=args.include, exclude=[*DISCOVERY_EXCLUDE, *args.exclude],
+                        max_depth=args.max_depth, skip_dirs=[comp_dir, non_comp_dir])
+    if args.watch:
+        if not Path(args.input).is_dir():
+            print(f"❌ 错误：监控模式需要文件夹: {args.input}", file=sys.stderr)
+            return 2
+        from services.watcher import FolderWatcher
+        videos = FolderWatcher(args.input, interval=args.interval, settle=args.settle, **scan_options)
+        # First Ctrl-C / SIGTERM stops watching and lets in-flight videos finish; a second Ctrl-C aborts
+        def stop_watching(signum, frame):
+            print("⏹ 停止监控，等待进行中的检测完成…", file=sys.stderr, flush=True)
+            videos.stop()
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGINT, stop_watching)
+        signal.signal(signal.SIGTERM, stop_watching)
+        print(f"👁 正在监控 {args.input}（每 {args.interval:g}s 扫描，文件稳定 {args.settle:g}s 后检测）", flush=True)
+    else:
+        videos = VideoScan(args.input, **scan_options)
+    if not args.watch and not videos:
+        print(f"❌ 错误：未找到支持的视频文件(.ts, .mp4, .mkv): {args.input}", file=sys.stderr)
+        return 2
+
+    checker = MVComplianceChecker(args.api_key, args.model, concurrency=args.concurrency,
+                                  fail_fast=args.fail_fast, rules=rules)
+    report = args.report or f"检测报告_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    formats = tuple(f.strip() for f in args.formats.split(",") if f.strip())
+    try:
+        writer = ReportWriter(report, formats)
+    except ValueError as e:
+        print(f"❌ 参数错误: {e}", file=sys.stderr)
+        return 2
+    except OSError as e:
+        print(f"❌ 错误：无法创建报告 {report}: {e}", file=sys.stderr)
+        return 2
+    manifest = args.manifest or (f"{report}.manifest.jsonl" if args.disposition == "manifest" else None)
+    try:
+        disposer = None if args.no_move else Disposer(comp_dir, non_comp_dir, args.disposition, args.io_workers, manifest)
+    except OSError as e:
+        writer.close(footer=False)
+        print(f"❌ 错误：无法创建输出文件夹或处置清单: {e}", file=sys.stderr)
+        return 2
+    pipeline = BatchPipeline(checker, disposer, workers=workers, journal=get_journal(), resume=not args.no_resume)
+    usage = BatchMetrics()
+
+    errors = 0
+    shown = 0  # Background move failures already printed
+    try:
+        for idx, result in enumerate(pipeline.run(videos), 1):
+            writer.write(result)
+            usage.add(result)
+            errors += "检测异常" in result["violated_rules"]
+            if not args.quiet:
+                total = videos.found if videos.finished else f"{videos.found}+"
+                print(f"[{idx}/{total}] {result['status']} {result['filename']} {result['violated_rules']} {result['details']}",
+                      flush=True)
+            shown = print_move_errors(disposer, shown)
+    except KeyboardInterrupt:
+        pipeline.stop()
+        print("⚠️ 已中断，可重新运行以继续", file=sys.stderr)
+        return 1
+    finally:
+        paths = writer.close(usage.summary_line())
+        if disposer:
+            if disposer.pending:
+                print(f"⏳ 等待 {disposer.pending} 个文件后台移动/复制完成…", file=sys.stderr, flush=True)
+            disposer.close()
+            print_move_errors(disposer, shown)
+
+    print(f"✅ 检测完成: 总计 {writer.total} 个, 合规 {writer.passed} 个, 不合规 {writer.total - writer.passed} 个")
+    if usage.summary_line():
+        print(usage.summary_line())
+    print(f"📁 报告: {', '.join(paths.values())}")
+    if disposer and disposer.manifest_path:
+        print(f"📄 处置清单: {disposer.manifest_path}")
+    move_errors = pipeline.move_errors + (disposer.errors if disposer else [])
+    if move_errors:
+        print(f"⚠️ {len(move_errors)} 个文件移动失败，重新运行将再次处置", file=sys.stderr)
+    return 1 if errors or move_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
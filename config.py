@@ -1,5 +1,6 @@
 # EarGuard Configuration
 import os
+from pathlib import Path
 
 # SiliconFlow API
 SILICONFLOW_API_KEY = os.getenv("SILICONFLOW_API_KEY", "")
@@ -9,15 +10,91 @@ SILICONFLOW_VL_MODELS = [
     "Qwen/Qwen3-VL-235B-A22B-Instruct",
 ]
 
+# API Transport
+API_TIMEOUT = 60  # seconds per request
+API_MAX_RETRIES = 3  # Retries on 429/5xx and connection errors
+API_BACKOFF_BASE = 1.0  # seconds, doubled per retry
+API_BACKOFF_MAX = 30.0  # Upper bound for backoff and Retry-After waits
+API_POOL_SIZE = 16  # Keep-alive connections
+API_RPM_LIMIT = int(os.getenv("SILICONFLOW_RPM", "0"))  # Requests per minute (0 = unlimited)
+API_TPM_LIMIT = int(os.getenv("SILICONFLOW_TPM", "0"))  # Tokens per minute (0 = unlimited)
+API_IMAGE_TOKEN_ESTIMATE = 1000  # Tokens budgeted per image for the TPM limiter
+
+# VLM Response Cache
+VLM_CACHE_ENABLED = os.getenv("MVGUARD_VLM_CACHE", "1") != "0"
+VLM_CACHE_FILE = Path.home() / ".mvguard" / "vlm_cache.sqlite"
+VLM_CACHE_MAX_ENTRIES = 200000  # LRU entries kept
+VLM_CACHE_MAX_AGE = 30 * 24 * 3600  # seconds; 0 = never expire
+
 # Video Processing
+PROBE_CACHE_PERSIST = True  # Keep ffprobe results across runs
+PROBE_CACHE_FILE = Path.home() / ".mvguard" / "probe_cache.sqlite"
+PROBE_CACHE_MAX_ENTRIES = 100000  # LRU probe results kept on disk
+PROBE_KEYFRAME_WINDOW = 10  # seconds of packets read per probe to estimate keyframe interval (extra I/O on network mounts)
 SUPPORTED_FORMATS = [".ts", ".mp4", ".mkv"]
+DISCOVERY_MAX_DEPTH = None  # Subfolder levels scanned below the input folder (None = unlimited, 0 = top only)
+DISCOVERY_EXCLUDE = (".*",)  # Skipped file/folder name patterns (hidden entries)
+WATCH_INTERVAL = 2.0  # seconds between hot-folder scans in watch mode
+WATCH_SETTLE = 5.0  # seconds a file's size/mtime must stay unchanged before it is checked
+DISPOSITION_MODE = "move"  # move | hardlink | symlink | manifest (record verdicts only, touch nothing)
+DISPOSITION_IO_WORKERS = 2  # Background cross-device copies running at once
 FRAME_SAMPLE_COUNT = 5  # Number of frames to sample for content analysis
 AUDIO_CHUNK_DURATION = 1.0  # seconds
+AUDIO_SAMPLE_RATE = 16000  # Hz; audio is decoded mono at this rate for level analysis
+AUDIO_LEVEL_MODE = "lufs"  # "lufs" (K-weighted) or "rms"
+ENABLED_RULES = [1, 2, 4, 8, 10, 11, 12]  # Rules run by default (3 = audio spikes, off)
+FAIL_FAST = False  # Skip costlier rules once a video already fails (False = full audit)
+FUSED_VLM_REQUESTS = True  # Merge rules that share frames into one JSON request
+CHECKER_CONCURRENCY = 4  # Checkers run in parallel per video (1 = sequential)
+PIPELINE_QUEUE_SIZE = 4  # Videos buffered between stages (bounds decoded frames in memory)
+PIPELINE_WORKERS = {"decode": 2, "local": 2, "vlm": 4, "verdict": 1, "move": 1}
+METRICS_PORT = int(os.getenv("MVGUARD_METRICS_PORT", "0"))  # Prometheus /metrics port (0 = disabled)
+JOURNAL_FILE = Path.home() / ".mvguard" / "journal.sqlite"  # Batch progress, for resuming after a crash
+JOURNAL_RESUME = True  # Default for the UI resume option
+REPORT_FORMATS = ("csv", "jsonl")  # Streamed report outputs; add "parquet" (needs pyarrow)
+REPORT_FLUSH_EVERY = 20  # Rows between report flushes
+REPORT_FLUSH_INTERVAL = 5.0  # seconds; flush at least this often while rows arrive
+UI_RECENT_ROWS = 200  # Rows kept in the UI results table (the full list is in the report)
+UI_REFRESH_INTERVAL = 0.5  # seconds; minimum gap between UI progress updates
+VLM_MAX_IMAGES = 4  # Images per request accepted by the model
+MOSAIC_ENABLED = True  # Tile sampled frames into labelled grids instead of separate images
+MOSAIC_GRID = (3, 2)  # (cols, rows) per mosaic image
+MOSAIC_TILE_SIZE = (480, 270)  # (w, h) of each cell
+ENCODE_PROFILES = {  # JPEG size/quality per kind of question
+    "scene": {"max_side": 768, "quality": 75},  # Yes/no scene questions
+    "ocr": {"max_side": 1280, "quality": 90},  # Reading credits and titles
+    "mosaic": {"max_side": 1440, "quality": 85},  # Grids: cells are already downscaled
+    "default": {"max_side": 1280, "quality": 85},
+}
+VLM_MAX_REQUEST_BYTES = 3 * 1024 * 1024  # Base64 image bytes per request
+ENCODE_CACHE_SIZE = 64  # Encoded frames (base64 text only) kept for reuse across rules
+FRAME_DEDUP_DISTANCE = 4  # Max dHash bit difference (of 64) treated as a duplicate frame
+FRAME_SEEK_GAP = 5.0  # seconds; closer planned frames are decoded forward instead of seeking
+FRAME_BATCH_INPUTS = 16  # Max seek inputs per ffmpeg process in batch extraction
 
 # Detection Thresholds
 BLACK_BORDER_THRESHOLD = 0.15  # 15% black pixels considered as border
+BORDER_SAMPLE_COUNT = 5  # Frames voting on the black border box
+BORDER_DARK_LEVEL = 15  # Gray level below which a pixel counts as black
 AUDIO_SPIKE_THRESHOLD = 3.0  # Standard deviations for volume spike
+AUDIO_SPIKE_WINDOW = 10  # Trailing windows forming the rolling baseline
+AUDIO_SPIKE_MIN_DB = 6.0  # Minimum jump (dB) from the baseline to count as a spike
 ASPECT_RATIO_VERTICAL = 1.0  # Width/Height < 1 is vertical
 
+# Static / Loop Detection
+STATIC_PROFILE_FPS = 2  # Frames per second decoded for the motion profile
+STATIC_PROFILE_SIZE = (64, 36)  # Gray frame size of the motion profile
+STATIC_MOTION_THRESHOLD = 0.002  # Mean abs diff (0-1) of profile frames below which a step is static (motion clips: 0.005+)
+STATIC_SEGMENT_RATIO = 0.8  # Static steps fraction that violates rule 12
+STATIC_LOOP_DIFF = 0.02  # RMS diff (0-1) at which frames one period apart count as repeats
+STATIC_LOOP_MIN = 2.0  # seconds; shortest loop period considered
+
 # File Naming
 EXPECTED_NAME_FORMAT = "{artist}-{song}"  # Expected: artist-song.ext
+
+# Lyrics / Subtitle Detection
+LYRICS_SCAN_STEP = 5  # seconds between locally scanned frames
+LYRICS_GAP_LIMIT = 60  # seconds without lyrics that violate rule 10
+SUBTITLE_BAND = (0.6, 1.0)  # Vertical span (fractions of height) searched for lyrics
+SUBTITLE_TEXT_SCORE = 0.12  # Text-line width fraction treated as lyrics present
+SUBTITLE_BLANK_SCORE = 0.03  # At or below: no lyrics; in between: ask the VLM
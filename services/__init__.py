@@ -1,5 +1,20 @@
-from .video_processor import VideoProcessor
-from .siliconflow_api import SiliconFlowClient
-from .report_generator import ReportGenerator
+import importlib
 
-__all__ = ["VideoProcessor", "SiliconFlowClient", "ReportGenerator"]
+# Imported on first access so that light entry points (CLI, metadata-only runs)
+# do not pay for OpenCV/NumPy/requests
+_LAZY = {
+    "VideoProcessor": ".video_processor",
+    "SiliconFlowClient": ".siliconflow_api",
+    "ReportGenerator": ".report_generator",
+    "MVComplianceChecker": ".compliance",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
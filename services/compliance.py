@@ -0,0 +1,281 @@
+"""Rule orchestration: prechecks, media planning, tiered checker runs and verdicts."""
+import contextvars
+import hashlib
+import importlib
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import config
+from config import CHECKER_CONCURRENCY, FAIL_FAST, FUSED_VLM_REQUESTS, ENABLED_RULES
+from checkers.base import CheckResult, COST_METADATA, COST_VLM
+from .video_info import VIDEO_INFO_CACHE
+from .fused_prompt import build_fused_prompt, parse_json_response
+from .metrics import Meter, measure
+from .report_generator import ReportGenerator
+
+# Rule id -> (module, class). Modules are imported only for enabled rules, so a
+# metadata-only run never loads OpenCV/NumPy and a local-only run never loads
+# the HTTP client.
+CHECKER_REGISTRY = {
+    1: ("checkers.lyricist_checker", "LyricistChecker"),
+    2: ("checkers.aspect_checker", "AspectChecker"),
+    3: ("checkers.audio_checker", "AudioChecker"),
+    4: ("checkers.content_checker", "ContentChecker"),
+    8: ("checkers.naming_checker", "NamingChecker"),
+    10: ("checkers.duration_checker", "DurationChecker"),
+    11: ("checkers.resolution_checker", "ResolutionChecker"),
+    12: ("checkers.static_checker", "StaticChecker"),
+}
+
+# Config settings that change rule results: journaled results are reused only
+# while these are unchanged (see MVComplianceChecker.rule_fingerprints)
+VERDICT_SETTINGS = (
+    "FRAME_SAMPLE_COUNT", "AUDIO_CHUNK_DURATION", "AUDIO_SAMPLE_RATE", "AUDIO_LEVEL_MODE",
+    "VLM_MAX_IMAGES", "MOSAIC_ENABLED", "MOSAIC_GRID", "MOSAIC_TILE_SIZE", "ENCODE_PROFILES",
+    "VLM_MAX_REQUEST_BYTES", "FRAME_DEDUP_DISTANCE",
+    "BLACK_BORDER_THRESHOLD", "BORDER_SAMPLE_COUNT", "BORDER_DARK_LEVEL", "AUDIO_SPIKE_THRESHOLD",
+    "AUDIO_SPIKE_WINDOW", "AUDIO_SPIKE_MIN_DB", "ASPECT_RATIO_VERTICAL",
+    "STATIC_PROFILE_FPS", "STATIC_PROFILE_SIZE", "STATIC_MOTION_THRESHOLD", "STATIC_SEGMENT_RATIO",
+    "STATIC_LOOP_DIFF", "STATIC_LOOP_MIN", "EXPECTED_NAME_FORMAT",
+    "LYRICS_SCAN_STEP", "LYRICS_GAP_LIMIT", "SUBTITLE_BAND", "SUBTITLE_TEXT_SCORE", "SUBTITLE_BLANK_SCORE",
+)
+
+
+def digest(value) -> str:
+    """Short stable hash of a JSON-able value."""
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def load_checker_class(rule_id: int) -> type:
+    """Import and return the checker class registered for a rule."""
+    module, name = CHECKER_REGISTRY[rule_id]
+    return getattr(importlib.import_module(module), name)
+
+
+class MVComplianceChecker:
+    """Main checker that runs the enabled rules (ENABLED_RULES by default)."""
+
+    def __init__(self, api_key: str, model: str = None, concurrency: int = CHECKER_CONCURRENCY,
+                 fail_fast: bool = FAIL_FAST, fused: bool = FUSED_VLM_REQUESTS, rules: list[int] = None):
+        self.concurrency = concurrency
+        self.fail_fast = fail_fast  # Skip costlier rules once a violation is found
+        self.fused = fused  # One JSON request per fused_group instead of one per checker
+        self.client = None  # Shared VLM client, created only when a VLM rule is enabled
+        checkers = []
+        for rule_id in (ENABLED_RULES if rules is None else rules):
+            cls = load_checker_class(rule_id)
+            if cls.cost >= COST_VLM:
+                if self.client is None:
+                    from .siliconflow_api import SiliconFlowClient
+                    self.client = SiliconFlowClient(api_key, model)
+                checkers.append(cls(self.client))
+            else:
+                checkers.append(cls())
+        # Cheapest first: metadata, then local CPU, then VLM
+        self.checkers = sorted(checkers, key=lambda c: (c.cost, c.rule_id))
+        # Journal keys: a rule result is reused only under the same fingerprint, a verdict
+        # only under the same rule set and fail-fast mode
+        settings = {name: getattr(config, name) for name in VERDICT_SETTINGS}
+        self.rule_fingerprints = {c.rule_id: self.rule_fingerprint(c, settings) for c in self.checkers}
+        self.fingerprint = digest({"rules": self.rule_fingerprints, "fail_fast": fail_fast})
+
+    def rule_fingerprint(self, checker, settings: dict) -> str:
+        """Rule version, class constants, detection settings and, for VLM rules, model and fusion."""
+        spec = {"rule": checker.rule_id, "class": type(checker).__qualname__, "version": checker.version,
+                "constants": {k: v for k, v in vars(type(checker)).items() if k.isupper()}, "settings": settings}
+        if checker.cost >= COST_VLM:
+            spec.update(model=self.client.model, fused=self.fused and bool(checker.fused_group))
+        return digest(spec)
+
+    @property
+    def local_checkers(self) -> list:
+        return [c for c in self.checkers if c.cost < COST_VLM]
+
+    @property
+    def vlm_checkers(self) -> list:
+        return [c for c in self.checkers if c.cost >= COST_VLM]
+
+    def stop_early(self, results: list[CheckResult]) -> bool:
+        """In fail-fast mode, whether the verdict is already final."""
+        return self.fail_fast and any(not r.passed for r in results)
+
+    def run_prechecks(self, video_path: str) -> list[CheckResult]:
+        """Metadata-only verdicts: metadata-tier checkers plus each checker's precheck()."""
+        info = VIDEO_INFO_CACHE.get(video_path)
+        results = []
+        for checker in self.checkers:
+            if checker.cost == COST_METADATA:
+                result = self.run_check(video_path, checker, {})
+            else:
+                result = checker.precheck(video_path, info)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def plan_media(self, video_path: str, checkers: list = None) -> dict:
+        """Merge checker media needs into one plan and decode it in one ffmpeg batch per frame size.
+
+        Returns per-checker kwargs for ``check()``; checkers without declared
+        needs are absent and fetch their own media.
+        """
+        info = VIDEO_INFO_CACHE.get(video_path)
+        needs = {c: c.media_needs(video_path, info) for c in (self.checkers if checkers is None else checkers)}
+        needs = {c: n for c, n in needs.items() if n is not None}
+        if not needs:
+            return {}
+        from .video_processor import VideoProcessor
+
+        # Decode each timestamp once, at the largest size any checker wants it
+        # (None = native), with one ffmpeg batch per size
+        def area(size):
+            return float("inf") if size is None else size[0] * size[1]
+
+        sizes = {}
+        for n in needs.values():
+            for t in n.timestamps:
+                t = round(t, 3)
+                if t not in sizes or area(n.resolution) > area(sizes[t]):
+                    sizes[t] = n.resolution
+        decoded = {}
+        for size in set(sizes.values()):
+            decoded.update(VideoProcessor.extract_frames_batch(video_path, [t for t, s in sizes.items() if s == size], size))
+
+        # Fall back to OpenCV for anything ffmpeg could not deliver
+        missing = [t for t, f in decoded.items() if f is None]
+        if missing:
+            decoded.update({t: f for t, f in VideoProcessor.extract_frames_at(video_path, missing).items() if f is not None})
+        audio = VideoProcessor.extract_audio_levels(video_path) if any(n.audio for n in needs.values()) else None
+
+        media = {}
+        for checker, need in needs.items():
+            frames = [decoded.get(round(t, 3)) for t in need.timestamps]
+            if need.resolution:
+                frames = [VideoProcessor.fit_frame(f, need.resolution) if f is not None else None for f in frames]
+            media[checker] = {"frames": frames}
+            if need.audio:
+                media[checker]["audio_levels"] = audio
+        return media
+
+    def pending(self, checkers: list, results: list[CheckResult]) -> list:
+        """Checkers whose rule has no result yet."""
+        done = {r.rule_id for r in results}
+        return [c for c in checkers if c.rule_id not in done]
+
+    def run_checkers(self, video_path: str, checkers: list, media: dict,
+                     prior: list[CheckResult] = ()) -> list[CheckResult]:
+        """Run checkers tier by tier (cheapest first), returning results in rule_id order.
+
+        Rules already decided in ``prior`` are skipped. Within a tier, checkers
+        run concurrently so their API round trips overlap. In fail-fast mode
+        costlier tiers are skipped once any violation is known.
+        """
+        checkers = self.pending(checkers, prior)
+        results = []
+        for cost in sorted({c.cost for c in checkers}):
+            if self.stop_early([*prior, *results]):
+                break
+            tier = [c for c in checkers if c.cost == cost]
+            results += self.run_tier(video_path, tier, media)
+        return sorted(results, key=lambda r: r.rule_id)
+
+    def run_tier(self, video_path: str, tier: list, media: dict) -> list[CheckResult]:
+        """Run one cost tier; fused requests overlap with the checkers outside their group.
+
+        Members of a fused group start once the group's answer (or failure)
+        is in, so only they wait on the fused round trip.
+        """
+        groups = self.fused_groups(video_path, tier, media) if self.fused else []
+        members = {c for sections in groups for c in sections}
+        if self.concurrency <= 1 or len(tier) + len(groups) <= 1:
+            for sections in groups:
+                self.hand_fused(sections, media, self.ask_fused(video_path, sections, media))
+            return [self.run_check(video_path, c, media.get(c, {})) for c in tier]
+
+        # Each task runs in a copy of this context so usage reaches the video's meter
+        def submit(fn, *args):
+            return pool.submit(contextvars.copy_context().run, fn, *args)
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(tier) + len(groups))) as pool:
+            fused = {submit(self.ask_fused, video_path, sections, media): sections for sections in groups}
+            futures = [submit(self.run_check, video_path, c, media.get(c, {})) for c in tier if c not in members]
+            for done in as_completed(fused):
+                sections = fused[done]
+                self.hand_fused(sections, media, done.result())
+                futures += [submit(self.run_check, video_path, c, media.get(c, {})) for c in sections]
+            return [f.result() for f in futures]
+
+    def run_check(self, video_path: str, checker, kwargs: dict) -> CheckResult:
+        """Run one checker, adding its wall time, API traffic and decoded frames to result.metrics."""
+        with measure() as meter:
+            result = checker.check(video_path, **kwargs)
+        result.metrics.update(meter.as_dict())
+        result.metrics["cache_hit"] = meter.cache_hits > 0
+        return result
+
+    def fused_groups(self, video_path: str, checkers: list, media: dict) -> list[dict]:
+        """Fused groups worth one shared request: {checker: (JSON key, question)} with 2+ members.
+
+        Members of a group share frames; on failure or unparseable output the
+        checkers simply make their own requests.
+        """
+        groups = {}
+        for checker in checkers:
+            if checker.fused_group and checker in media:
+                groups.setdefault(checker.fused_group, []).append(checker)
+
+        fusable = []
+        for members in groups.values():
+            sections = {c: c.fused_section(video_path) for c in members}
+            sections = {c: s for c, s in sections.items() if s}
+            if len(sections) >= 2 and any(f is not None for f in media[next(iter(sections))]["frames"]):
+                fusable.append(sections)
+        return fusable
+
+    def ask_fused(self, video_path: str, sections: dict, media: dict) -> dict | None:
+        """One request for all of a group's questions; the parsed JSON answer, or None."""
+        from .video_processor import VideoProcessor
+
+        frames = [f for f in media[next(iter(sections))]["frames"] if f is not None]
+        images = VideoProcessor.frames_to_base64(frames, "ocr")
+        try:
+            return parse_json_response(self.client.analyze_images(images, build_fused_prompt(list(sections.values()))))
+        except Exception:
+            return None
+
+    @staticmethod
+    def hand_fused(sections: dict, media: dict, answer: dict | None):
+        """Give each group member the shared answer (None: they ask on their own)."""
+        if answer is not None:
+            for checker in sections:
+                media[checker]["fused"] = answer
+
+    def verdict(self, video_path: str, results: list[CheckResult], meter: Meter = None) -> dict:
+        """Combine rule results (and the video's usage totals) into a report row."""
+        violated = [f"规则{r.rule_id}: {r.reason}" for r in sorted(results, key=lambda r: r.rule_id) if not r.passed]
+
+        is_compliant = len(violated) == 0
+        report = ReportGenerator.create_result(
+            video_path,
+            is_compliant,
+            violated,
+            "; ".join(violated) if violated else "通过所有检测"
+        )
+        if meter is not None:
+            report.update(meter.as_dict())
+        report["rule_times"] = {r.rule_id: r.metrics["wall_time"] for r in results if "wall_time" in r.metrics}
+        shown = {c.rule_id: c.report_metrics for c in self.checkers if c.report_metrics}
+        measured = {r.rule_id: {k: r.metrics[k] for k in shown.get(r.rule_id, ()) if r.metrics.get(k) is not None}
+                    for r in results}
+        report["rule_metrics"] = {rule_id: m for rule_id, m in sorted(measured.items()) if m}
+        return report
+
+    def check_video(self, video_path: str) -> dict:
+        """Run all checks on a single video."""
+        meter = Meter()
+        with measure(meter):
+            results = self.run_prechecks(video_path)
+            if not self.stop_early(results):
+                pending = self.pending(self.checkers, results)
+                media = self.plan_media(video_path, pending)
+                results += self.run_checkers(video_path, pending, media, prior=results)
+        return self.verdict(video_path, results, meter)
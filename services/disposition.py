@@ -0,0 +1,183 @@
+"""File disposition: route checked videos to the compliant / non-compliant folders."""
+import errno
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from config import DISPOSITION_MODE, DISPOSITION_IO_WORKERS
+
+
+class NameReserver:
+    """Collision-free destination names without probing the disk once per collision.
+
+    Each folder is listed once on first use; later names come from the
+    in-memory set plus a per-(folder, name) counter, so picking a name is O(1)
+    however many duplicates a batch produces.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._taken: dict[str, set] = {}
+        self._counters: dict[tuple, int] = {}
+
+    def reserve(self, folder: Path, name: str) -> Path:
+        key = str(folder)
+        with self._lock:
+            taken = self._taken.get(key)
+            if taken is None:
+                taken = self._taken[key] = set(os.listdir(folder)) if folder.is_dir() else set()
+            stem, suffix = os.path.splitext(name)
+            n = self._counters.get((key, name), 0)
+            candidate = f"{stem}_{n}{suffix}" if n else name
+            # One stat per picked name guards against files created behind our back
+            while candidate in taken or os.path.lexists(folder / candidate):
+                taken.add(candidate)
+                n += 1
+                candidate = f"{stem}_{n}{suffix}"
+            self._counters[(key, name)] = n
+            taken.add(candidate)
+        return folder / candidate
+
+
+class Disposer:
+    """Pipeline dispose callback: move, link or just record each video by verdict.
+
+    Modes (DISPOSITION_MODE):
+      move      atomic rename; across filesystems the copy runs on a
+                background mover with DISPOSITION_IO_WORKERS threads, so a
+                multi-GB copy never blocks the next check
+      hardlink  keep the source, hard-link it into place (copy across filesystems)
+      symlink   keep the source, symlink it into place
+      manifest  touch nothing, only record where each file would go
+
+    Every decision is appended to the optional JSONL manifest. Calls return
+    None when the file is in place, or a Future for a background copy; the
+    pipeline journals the move only once it completes; failed copies are
+    collected in errors for the caller to report. Use as a context
+    manager (or call close()) to wait for pending copies.
+    """
+
+    MODES = ("move", "hardlink", "symlink", "manifest")
+    NOTES = {"move": "已移动", "copy": "后台移动", "hardlink": "已硬链接", "hardlink_copy": "后台复制",
+             "symlink": "已软链接", "manifest": "仅记录"}
+
+    def __init__(self, compliant_dir: str, non_compliant_dir: str, mode: str = DISPOSITION_MODE,
+                 io_workers: int = DISPOSITION_IO_WORKERS, manifest: str = None):
+        if mode not in self.MODES:
+            raise ValueError(f"未知处置方式: {mode} (可选: {', '.join(self.MODES)})")
+        self.dirs = {True: Path(compliant_dir), False: Path(non_compliant_dir)}
+        self.mode = mode
+        if mode != "manifest":
+            for folder in self.dirs.values():
+                folder.mkdir(parents=True, exist_ok=True)
+        self.names = NameReserver()
+        self.errors: list[str] = []
+        self._mover = ThreadPoolExecutor(max_workers=max(1, io_workers), thread_name_prefix="mvguard-mover")
+        self._pending: set[Future] = set()
+        self._lock = threading.Lock()
+        self.manifest_path = manifest
+        self._manifest = None
+        if manifest:
+            Path(manifest).parent.mkdir(parents=True, exist_ok=True)
+            self._manifest = open(manifest, "a", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __call__(self, video: str, result: dict) -> Future | None:
+        src = Path(video)
+        dest = self.names.reserve(self.dirs[result["status"] == "合规"], src.name)
+        action = self.mode
+        future = None
+        if self.mode == "move":
+            action, future = self._move(src, dest)
+        elif self.mode == "hardlink":
+            try:
+                os.link(src, dest)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                # Across filesystems the source stays and a copy takes the link's place
+                action, future = "hardlink_copy", self._submit(src, dest, keep_source=True)
+        elif self.mode == "symlink":
+            os.symlink(src.resolve(), dest)
+
+        # A row restored from an earlier run in another mode: replace its note
+        previous = result.get("disposition")
+        for note in self.NOTES.values():
+            if previous and result["details"].endswith(f" [{note}]"):
+                result["details"] = result["details"][:-len(note) - 3]
+                break
+        result["destination"] = str(dest)
+        result["disposition"] = self.mode
+        result["details"] += f" [{self.NOTES[action]}]"
+        self._record(src, dest, result, action)
+        return future
+
+    def _move(self, src: Path, dest: Path) -> tuple[str, Future | None]:
+        try:
+            os.rename(src, dest)
+            return "move", None
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        return "copy", self._submit(src, dest)
+
+    @staticmethod
+    def _copy(src: Path, dest: Path, keep_source: bool = False):
+        """Cross-device copy to a hidden temp name, published atomically; the source is dropped after."""
+        tmp = dest.with_name(f".{dest.name}.part")
+        try:
+            shutil.copy2(src, tmp)
+            os.replace(tmp, dest)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        if not keep_source:
+            os.unlink(src)
+
+    def _submit(self, src: Path, dest: Path, keep_source: bool = False) -> Future:
+        future = self._mover.submit(self._copy, src, dest, keep_source)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(lambda f: self._finished(f, src))
+        return future
+
+    def _finished(self, future: Future, src: Path):
+        with self._lock:
+            self._pending.discard(future)
+            if future.exception() is not None:
+                self.errors.append(f"{src}: {future.exception()}")
+
+    def _record(self, src: Path, dest: Path, result: dict, action: str):
+        if not self._manifest:
+            return
+        line = json.dumps({"source": str(src), "destination": str(dest), "status": result["status"],
+                           "violated_rules": result.get("violated_rules", ""), "action": action}, ensure_ascii=False)
+        with self._lock:
+            self._manifest.write(line + "\n")
+            self._manifest.flush()
+
+    @property
+    def keeps_source(self) -> bool:
+        """Whether the source stays in place (journaled as KEPT, so resume does not recheck it)."""
+        return self.mode != "move"
+
+    @property
+    def pending(self) -> int:
+        """Background copies not finished yet."""
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        """Wait for background copies and close the manifest."""
+        self._mover.shutdown(wait=True)
+        with self._lock:
+            if self._manifest:
+                self._manifest.close()
+                self._manifest = None
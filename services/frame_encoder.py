@@ -0,0 +1,73 @@
+"""JPEG/base64 encoding of frames for VLM requests, per-rule sized and cached."""
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+from config import ENCODE_PROFILES, VLM_MAX_REQUEST_BYTES, ENCODE_CACHE_SIZE
+
+
+class FrameEncoder:
+    """Encode frames with a named size/quality profile under a per-request byte budget.
+
+    Encodings are cached per (frame content, profile) so a frame shared by
+    several rules is only compressed once. Entries hold only the encoded
+    text, keyed on a digest of the pixels, so the cache never keeps decoded
+    frames alive after the pipeline releases them.
+    """
+
+    MIN_QUALITY = 40  # Budget shrinking stops lowering quality here
+
+    def __init__(self, profiles: dict = ENCODE_PROFILES, cache_size: int = ENCODE_CACHE_SIZE):
+        self.profiles = profiles
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, frame: np.ndarray, profile: str = "default") -> str:
+        """Base64 JPEG of frame using the profile's max side and quality."""
+        p = self.profiles.get(profile, self.profiles["default"])
+        return self._encode(frame, p["max_side"], p["quality"])
+
+    def encode_batch(self, frames: list[np.ndarray], profile: str = "default",
+                     max_bytes: int = VLM_MAX_REQUEST_BYTES) -> list[str]:
+        """Encode frames for one request, shrinking all of them until they fit max_bytes."""
+        p = self.profiles.get(profile, self.profiles["default"])
+        max_side, quality = p["max_side"], p["quality"]
+        while True:
+            images = [self._encode(f, max_side, quality) for f in frames]
+            if sum(len(i) for i in images) <= max_bytes or (quality <= self.MIN_QUALITY and max_side <= 256):
+                return images
+            quality = max(self.MIN_QUALITY, quality - 15)
+            max_side = max(256, int(max_side * 0.75))
+
+    @staticmethod
+    def digest(frame: np.ndarray) -> bytes:
+        """Content key for a frame (shape and pixels)."""
+        h = hashlib.blake2b(repr((frame.shape, frame.dtype.str)).encode(), digest_size=16)
+        h.update(np.ascontiguousarray(frame).data)
+        return h.digest()
+
+    def _encode(self, frame: np.ndarray, max_side: int, quality: int) -> str:
+        key = (self.digest(frame), max_side, quality)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+
+        h, w = frame.shape[:2]
+        scale = max_side / max(h, w)
+        img = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA) if scale < 1 else frame
+        _, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        encoded = base64.b64encode(buffer).decode("utf-8")
+
+        with self._lock:
+            self._cache[key] = encoded
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return encoded
+
+
+FRAME_ENCODER = FrameEncoder()
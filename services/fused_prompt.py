@@ -0,0 +1,33 @@
+"""Fused multi-rule VLM prompts with JSON answers."""
+import json
+import re
+
+
+def build_fused_prompt(sections: list[tuple[str, str]]) -> str:
+    """Combine (key, question) rule sections into one JSON-answer prompt."""
+    lines = [f'- "{key}": {question}' for key, question in sections]
+    example = "{" + ", ".join(f'"{key}": ...' for key, _ in sections) + "}"
+    return (
+        "请仔细查看这些音乐MV画面，回答以下每一项：\n"
+        + "\n".join(lines)
+        + f"\n\n只输出一个JSON对象，不要解释，格式：{example}"
+    )
+
+
+def parse_json_response(response: str) -> dict | None:
+    """Extract the first JSON object from a model reply (tolerates code fences)."""
+    match = re.search(r"\{.*\}", response or "", re.S)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def as_bool(value) -> bool:
+    """Interpret model booleans, including '是'/'否' strings."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "yes", "是", "有", "1")
+    return bool(value)
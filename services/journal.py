@@ -0,0 +1,146 @@
+"""Crash-safe batch journal (SQLite): per-rule results, verdicts and moves per file."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from checkers.base import CheckResult
+from config import JOURNAL_FILE
+
+
+class BatchJournal:
+    """Durable record of batch progress keyed on file identity.
+
+    Every finished rule, verdict and move is committed immediately, so after
+    a crash a resumed batch reuses completed rules, re-moves files that were
+    judged but not moved, and only checks what is left. Rule results and
+    verdicts carry the checker's fingerprints and are only reused while those
+    match, so a run with other rules, settings or model checks again.
+    """
+
+    # File states, in order
+    CHECKING = "checking"
+    CHECKED = "checked"
+    MOVED = "moved"
+    KEPT = "kept"  # Disposed without moving the source (links, manifest): done, restored on resume
+
+    def __init__(self, path: Path = JOURNAL_FILE):
+        self.path = Path(path)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def identity(video_path: str) -> str:
+        """Name, size and mtime digest: stable across moves, changes when the file is replaced."""
+        st = os.stat(video_path)
+        key = f"{Path(video_path).name}\0{st.st_size}\0{st.st_mtime_ns}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def start(self, identity: str, video_path: str, resume: bool = True, fingerprint: str = ""):
+        """Register a file under the checker's fingerprint; without resume, anything journaled is discarded."""
+        with self._lock:
+            conn = self._connect()
+            if not resume:
+                conn.execute("DELETE FROM files WHERE identity = ?", (identity,))
+                conn.execute("DELETE FROM rule_results WHERE identity = ?", (identity,))
+            conn.execute(
+                "INSERT INTO files (identity, path, state, updated, fingerprint) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(identity) DO UPDATE SET path = excluded.path, updated = excluded.updated, "
+                "fingerprint = excluded.fingerprint",
+                (identity, str(video_path), self.CHECKING, time.time(), fingerprint),
+            )
+
+    def completed_rules(self, identity: str, fingerprints: dict[int, str]) -> list[CheckResult]:
+        """Rule results journaled for the file under the given {rule_id: fingerprint}; other rules are ignored."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT rule_id, rule_name, passed, reason, metrics, fingerprint FROM rule_results "
+                "WHERE identity = ? ORDER BY rule_id",
+                (identity,),
+            ).fetchall()
+        return [CheckResult(r[0], r[1], bool(r[2]), r[3], json.loads(r[4] or "{}"))
+                for r in rows if fingerprints.get(r[0]) == r[5]]
+
+    def report(self, identity: str, fingerprint: str = None) -> tuple[str, dict] | None:
+        """(state, report row) once the file has a verdict (under the given fingerprint), else None.
+
+        MOVED rows are returned whatever their fingerprint: they are never
+        restored, only mark a file that is back and must be checked from scratch.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT state, report, fingerprint FROM files WHERE identity = ?", (identity,)).fetchone()
+        if not row or not row[1]:
+            return None
+        if fingerprint is not None and row[2] != fingerprint and row[0] != self.MOVED:
+            return None  # Judged under other rules or settings
+        report = json.loads(row[1])
+        # JSON turns the int rule ids in rule_times / rule_metrics into strings
+        for key in ("rule_times", "rule_metrics"):
+            report[key] = {int(k): v for k, v in report.get(key, {}).items()}
+        return row[0], report
+
+    def record_results(self, identity: str, results: list[CheckResult], fingerprints: dict[int, str]):
+        with self._lock:
+            self._connect().executemany(
+                "INSERT OR REPLACE INTO rule_results (identity, rule_id, rule_name, passed, reason, metrics, fingerprint) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(identity, r.rule_id, r.rule_name, int(r.passed), r.reason,
+                  json.dumps(r.metrics, ensure_ascii=False, default=str), fingerprints.get(r.rule_id, ""))
+                 for r in results],
+            )
+
+    def record_report(self, identity: str, report: dict):
+        self._set(identity, self.CHECKED, report)
+
+    def record_move(self, identity: str, report: dict, source_kept: bool = False):
+        self._set(identity, self.KEPT if source_kept else self.MOVED, report)
+
+    def stats(self) -> dict:
+        """Number of journaled files per state."""
+        with self._lock:
+            return dict(self._connect().execute("SELECT state, COUNT(*) FROM files GROUP BY state").fetchall())
+
+    def _set(self, identity: str, state: str, report: dict):
+        with self._lock:
+            self._connect().execute(
+                "UPDATE files SET state = ?, report = ?, updated = ? WHERE identity = ?",
+                (state, json.dumps(report, ensure_ascii=False), time.time(), identity),
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files "
+                "(identity TEXT PRIMARY KEY, path TEXT, state TEXT, report TEXT, updated REAL, fingerprint TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rule_results "
+                "(identity TEXT, rule_id INTEGER, rule_name TEXT, passed INTEGER, reason TEXT, metrics TEXT, "
+                "fingerprint TEXT, PRIMARY KEY (identity, rule_id))"
+            )
+            # Journals written before fingerprints: the missing column reads as NULL, so nothing old is reused
+            for table in ("files", "rule_results"):
+                columns = {r[1] for r in self._conn.execute(f"PRAGMA table_info({table})")}
+                if "fingerprint" not in columns:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN fingerprint TEXT")
+        return self._conn
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_journal() -> BatchJournal:
+    """Process-wide batch journal."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = BatchJournal()
+        return _shared
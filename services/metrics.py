@@ -0,0 +1,173 @@
+"""Per-check resource accounting: wall time, API traffic, decoded/deduplicated frames, cache hits."""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COUNTERS = ("api_calls", "bytes_uploaded", "frames_decoded", "frames_deduped", "cache_hits")
+
+
+@dataclass
+class Meter:
+    """Counters for one unit of work (a check, a video)."""
+    wall_time: float = 0.0
+    api_calls: int = 0
+    bytes_uploaded: int = 0
+    frames_decoded: int = 0
+    frames_deduped: int = 0  # Near-duplicate frames not sent to the VLM
+    cache_hits: int = 0
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["wall_time"] = round(self.wall_time, 3)
+        return data
+
+
+# Meters active in the current context, innermost last
+_active: ContextVar[tuple] = ContextVar("mvguard_meters", default=())
+_lock = threading.Lock()
+
+
+def record(**counts):
+    """Add counts (see COUNTERS) to every meter active in this context; no-op outside measure()."""
+    meters = _active.get()
+    if not meters:
+        return
+    with _lock:
+        for meter in meters:
+            for name, value in counts.items():
+                setattr(meter, name, getattr(meter, name) + value)
+
+
+@contextmanager
+def measure(meter: Meter = None):
+    """Activate meter (or a new one) for the block and add the block's wall time to it.
+
+    Counts recorded inside also reach the enclosing meters. Re-entering a
+    meter that is already active is a no-op, so time is not counted twice.
+    Worker threads start with an empty context; submit with
+    contextvars.copy_context().run to keep the enclosing meters.
+    """
+    meter = meter or Meter()
+    meters = _active.get()
+    if any(m is meter for m in meters):
+        yield meter
+        return
+    token = _active.set(meters + (meter,))
+    start = time.perf_counter()
+    try:
+        yield meter
+    finally:
+        elapsed = time.perf_counter() - start
+        _active.reset(token)
+        with _lock:
+            meter.wall_time += elapsed
+
+
+class BatchMetrics:
+    """Totals over report rows, overall and per rule."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.videos = 0
+        self.restored = 0  # Rows restored from the journal; their usage belongs to an earlier run
+        self.errors = 0  # Rows of videos that could not be checked; no usage, not in the averages
+        self.totals = Meter()
+        self.rule_time: dict[int, float] = {}
+        self.rule_count: dict[int, int] = {}
+
+    def add(self, report: dict):
+        """Fold in one report row (as produced by MVComplianceChecker.verdict)."""
+        with self._lock:
+            if report.get("restored"):
+                self.restored += 1
+                return
+            if report.get("error"):
+                self.errors += 1
+                return
+            self.videos += 1
+            self.totals.wall_time += report.get("wall_time", 0.0)
+            for name in COUNTERS:
+                setattr(self.totals, name, getattr(self.totals, name) + report.get(name, 0))
+            for rule_id, seconds in report.get("rule_times", {}).items():
+                self.rule_time[rule_id] = self.rule_time.get(rule_id, 0.0) + seconds
+                self.rule_count[rule_id] = self.rule_count.get(rule_id, 0) + 1
+
+    def slowest_rule(self) -> tuple[int, float] | None:
+        """(rule_id, mean seconds) of the rule with the highest mean time."""
+        with self._lock:
+            if not self.rule_time:
+                return None
+            rule_id = max(self.rule_time, key=lambda r: self.rule_time[r] / self.rule_count[r])
+            return rule_id, self.rule_time[rule_id] / self.rule_count[rule_id]
+
+    def summary_line(self) -> str:
+        """One-line Chinese summary for the UI."""
+        extra = [f"检测异常 {self.errors} 个"] if self.errors else []
+        if self.restored:
+            extra.append(f"续检复用 {self.restored} 个")
+        if not self.videos:
+            return f"{'⚠️' if self.errors else '♻️'} {' · '.join(extra)}" if extra else ""
+        t = self.totals
+        line = (f"⏱ 平均 {t.wall_time / self.videos:.1f}s/个 · API调用 {t.api_calls} 次"
+                f" · 上传 {t.bytes_uploaded / 1024 / 1024:.1f} MB · 解码 {t.frames_decoded} 帧 · 去重 {t.frames_deduped} 帧 · 缓存命中 {t.cache_hits} 次")
+        slowest = self.slowest_rule()
+        if slowest:
+            line += f" · 最慢规则{slowest[0]} ({slowest[1]:.1f}s)"
+        return " · ".join([line, *extra])
+
+    def prometheus_text(self) -> str:
+        """Counters in the Prometheus text exposition format."""
+        with self._lock:
+            t = self.totals
+            lines = [
+                "# TYPE mvguard_videos_total counter", f"mvguard_videos_total {self.videos}",
+                "# TYPE mvguard_errors_total counter", f"mvguard_errors_total {self.errors}",
+                "# TYPE mvguard_check_seconds_total counter", f"mvguard_check_seconds_total {t.wall_time:.3f}",
+            ]
+            for name in COUNTERS:
+                lines += [f"# TYPE mvguard_{name}_total counter", f"mvguard_{name}_total {getattr(t, name)}"]
+            lines.append("# TYPE mvguard_rule_seconds_total counter")
+            lines += [f'mvguard_rule_seconds_total{{rule="{r}"}} {s:.3f}' for r, s in sorted(self.rule_time.items())]
+            lines.append("# TYPE mvguard_rule_checks_total counter")
+            lines += [f'mvguard_rule_checks_total{{rule="{r}"}} {n}' for r, n in sorted(self.rule_count.items())]
+        return "\n".join(lines) + "\n"
+
+
+_process = None
+_process_lock = threading.Lock()
+
+
+def get_process_metrics() -> BatchMetrics:
+    """Process-wide totals across all batches (what the Prometheus endpoint serves)."""
+    global _process
+    with _process_lock:
+        if _process is None:
+            _process = BatchMetrics()
+        return _process
+
+
+def serve_prometheus(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve get_process_metrics() at /metrics from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = get_process_metrics().prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,217 @@
+"""Staged batch pipeline: videos flow through bounded queues between worker pools."""
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator
+from config import PIPELINE_QUEUE_SIZE, PIPELINE_WORKERS
+from .report_generator import ReportGenerator
+from .metrics import Meter, measure
+from .journal import BatchJournal
+
+_DONE = object()  # End-of-stream marker passed between stages
+
+
+@dataclass
+class VideoJob:
+    """A single video travelling through the pipeline."""
+    path: str
+    media: dict = field(default_factory=dict)
+    results: list = field(default_factory=list)
+    report: dict | None = None
+    error: str = ""
+    meter: Meter = field(default_factory=Meter)  # Usage across all stages
+    identity: str = ""  # Journal key
+    disposed: str = ""  # Disposition mode of an earlier run that kept the source in place
+
+
+class BatchPipeline:
+    """Overlap decode, local checks, VLM calls and file moves across videos.
+
+    Stages: discovery -> decode -> local -> vlm -> verdict -> move. Each stage
+    has its own worker count; bounded queues between them cap how many decoded
+    videos are held in memory. Results are yielded in completion order.
+    """
+
+    STAGES = ["decode", "local", "vlm", "verdict", "move"]
+
+    def __init__(self, checker, dispose: Callable[[str, dict], Future | None] = None,
+                 workers: dict = None, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 journal: BatchJournal = None, resume: bool = True):
+        self.checker = checker
+        self.dispose = dispose
+        self.journal = journal  # Records progress as it happens; None disables journaling
+        self.resume = resume  # Reuse journaled rule results and verdicts
+        self.workers = {**PIPELINE_WORKERS, **(workers or {})}
+        self.queue_size = queue_size
+        self.move_errors: list[str] = []  # Synchronous dispose failures ("path: error")
+        self._errors_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, paths: Iterable) -> Iterator[dict]:
+        """Feed paths through all stages and yield report rows as they finish."""
+        self._stop.clear()
+        queues = [queue.Queue(self.queue_size) for _ in self.STAGES] + [queue.Queue()]
+        threads = [threading.Thread(target=self._discover, args=(paths, queues[0]), daemon=True)]
+
+        for i, stage in enumerate(self.STAGES):
+            count = max(1, self.workers.get(stage, 1))
+            downstream = self.workers.get(self.STAGES[i + 1], 1) if i + 1 < len(self.STAGES) else 1
+            remaining = [count]
+            lock = threading.Lock()
+            for _ in range(count):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(getattr(self, f"_{stage}"), queues[i], queues[i + 1], remaining, lock, max(1, downstream)),
+                    daemon=True,
+                ))
+
+        for t in threads:
+            t.start()
+
+        try:
+            while True:
+                job = self._get(queues[-1])
+                if job is _DONE or job is None:
+                    break
+                if job.report is None:
+                    job.report = self._error_report(job)
+                yield job.report
+        finally:
+            self._stop.set()
+
+    def stop(self):
+        """Abort the batch; in-flight videos are dropped."""
+        self._stop.set()
+
+    def _discover(self, paths: Iterable, out: queue.Queue):
+        for path in paths:
+            if not self._put(out, VideoJob(str(path))):
+                return
+        for _ in range(max(1, self.workers.get(self.STAGES[0], 1))):
+            self._put(out, _DONE)
+
+    def _work(self, fn, inbox: queue.Queue, out: queue.Queue, remaining: list, lock, downstream: int):
+        while True:
+            job = self._get(inbox)
+            if job is None:
+                return
+            if job is _DONE:
+                # Last worker of this stage forwards end-of-stream to the next one
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    for _ in range(downstream):
+                        self._put(out, _DONE)
+                return
+            try:
+                with measure(job.meter):
+                    fn(job)
+            except Exception as e:
+                job.error = job.error or f"{fn.__name__.strip('_')}: {e}"
+            if not self._put(out, job):
+                return
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return None
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # Stage bodies
+
+    def _decode(self, job: VideoJob):
+        if self.journal:
+            job.identity = self.journal.identity(job.path)
+            done = self.journal.report(job.identity, self.checker.fingerprint) if self.resume else None
+            if done and done[0] != BatchJournal.MOVED:
+                # Judged before a crash (only the move is left), or disposed with the source kept
+                job.report = {**done[1], "restored": True}  # Usage belongs to the earlier run
+                job.disposed = job.report.get("disposition", "") if done[0] == BatchJournal.KEPT else ""
+                return
+            # A file that was already moved and is back gets checked from scratch
+            self.journal.start(job.identity, job.path, resume=self.resume and not done,
+                               fingerprint=self.checker.fingerprint)
+            # Only rules still enabled, journaled under the same settings
+            job.results = self.journal.completed_rules(job.identity, self.checker.rule_fingerprints)
+
+        decided = {r.rule_id for r in job.results}
+        prechecks = [r for r in self.checker.run_prechecks(job.path) if r.rule_id not in decided]
+        job.results += prechecks
+        self._journal_results(job, prechecks)
+        if not self.checker.stop_early(job.results):
+            job.media = self.checker.plan_media(job.path, self.checker.pending(self.checker.checkers, job.results))
+
+    def _local(self, job: VideoJob):
+        if not job.error and job.report is None:
+            results = self.checker.run_checkers(job.path, self.checker.local_checkers, job.media, job.results)
+            job.results += results
+            self._journal_results(job, results)
+
+    def _vlm(self, job: VideoJob):
+        if not job.error and job.report is None:
+            results = self.checker.run_checkers(job.path, self.checker.vlm_checkers, job.media, job.results)
+            job.results += results
+            self._journal_results(job, results)
+        job.media = {}  # Release decoded frames early
+
+    def _verdict(self, job: VideoJob):
+        if job.error:
+            job.report = self._error_report(job)
+            return
+        if job.report is not None:
+            return  # Restored from the journal
+        job.report = self.checker.verdict(job.path, job.results, job.meter)
+        if self.journal:
+            self.journal.record_report(job.identity, job.report)
+
+    def _move(self, job: VideoJob):
+        if job.error:
+            if job.report:
+                job.report["details"] += " [未移动]"
+            return
+        if not self.dispose:
+            return  # Nothing disposed: the row stays CHECKED and is restored on resume
+        if job.disposed and job.disposed == getattr(self.dispose, "mode", None):
+            return  # Already linked / listed the same way before
+        try:
+            pending = self.dispose(job.path, job.report)
+        except Exception as e:
+            # Left CHECKED in the journal, so a resumed batch tries the move again
+            job.report["details"] += f" [未移动] 移动失败: {e}"
+            with self._errors_lock:
+                self.move_errors.append(f"{job.path}: {e}")
+            return
+        if not self.journal:
+            return
+        kept = getattr(self.dispose, "keeps_source", False)
+        if isinstance(pending, Future):
+            # Background copy: journal the move only once the file is in place
+            identity, report = job.identity, dict(job.report)
+            pending.add_done_callback(
+                lambda f: f.exception() is None and self.journal.record_move(identity, report, kept))
+        else:
+            self.journal.record_move(job.identity, job.report, kept)
+
+    @staticmethod
+    def _error_report(job: VideoJob) -> dict:
+        """Row for a video that could not be checked; flagged so batch metrics leave it out of usage."""
+        report = ReportGenerator.create_result(job.path, False, ["检测异常"], f"检测异常: {job.error}")
+        report["error"] = True
+        return report
+
+    def _journal_results(self, job: VideoJob, results: list):
+        if self.journal and results:
+            self.journal.record_results(job.identity, results, self.checker.rule_fingerprints)
@@ -1,6 +1,131 @@
-import pandas as pd
+import csv
+import json
+import time
 from datetime import datetime
 from pathlib import Path
+from config import REPORT_FLUSH_EVERY, REPORT_FLUSH_INTERVAL
+
+REPORT_COLUMNS = [
+    "filename", "status", "violated_rules", "details", "checked_at",
+    "wall_time", "api_calls", "bytes_uploaded", "frames_decoded", "frames_deduped", "cache_hits", "rule_times",
+    "rule_metrics", "destination",
+]
+NUMERIC_COLUMNS = {"wall_time", "api_calls", "bytes_uploaded", "frames_decoded", "frames_deduped", "cache_hits"}
+
+
+class ReportWriter:
+    """Append report rows to CSV / JSONL / Parquet files as they are produced.
+
+    Rows are written immediately and flushed every REPORT_FLUSH_EVERY rows or
+    REPORT_FLUSH_INTERVAL seconds, so a partial report is usable while the
+    batch runs and memory does not grow with it. close() adds a summary
+    footer. CSV is utf-8-sig so Excel detects the encoding. Parquet needs the
+    optional pyarrow package, imported only when that format is requested;
+    unknown or unavailable formats raise ValueError before any file is opened.
+    """
+
+    FORMATS = ("csv", "jsonl", "parquet")
+
+    def __init__(self, path: str, formats: tuple = ("csv",),
+                 flush_every: int = REPORT_FLUSH_EVERY, flush_interval: float = REPORT_FLUSH_INTERVAL):
+        unknown = [f for f in formats if f not in self.FORMATS]
+        if unknown:
+            raise ValueError(f"未知报告格式: {', '.join(unknown)} (可选: {', '.join(self.FORMATS)})")
+        if not formats:
+            raise ValueError(f"至少需要一种报告格式 (可选: {', '.join(self.FORMATS)})")
+        self._pa = None
+        if "parquet" in formats:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ValueError("Parquet 报告需要安装 pyarrow (pip install pyarrow)") from None
+            self._pa = pa
+        base = Path(path)
+        if base.suffix.lstrip(".") in self.FORMATS:
+            base = base.with_suffix("")
+        base.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.total = 0
+        self.passed = 0
+        self.paths = {}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._csv = self._jsonl = self._parquet = None
+        self._parquet_rows = []
+
+        if "csv" in formats:
+            self.paths["csv"] = f"{base}.csv"
+            self._csv_file = open(self.paths["csv"], "w", encoding="utf-8-sig", newline="")
+            self._csv = csv.DictWriter(self._csv_file, fieldnames=REPORT_COLUMNS, extrasaction="ignore")
+            self._csv.writeheader()
+        if "jsonl" in formats:
+            self.paths["jsonl"] = f"{base}.jsonl"
+            self._jsonl = open(self.paths["jsonl"], "w", encoding="utf-8")
+        if "parquet" in formats:
+            self.paths["parquet"] = f"{base}.parquet"
+            types = {c: pa.float64() if c == "wall_time" else pa.int64() for c in NUMERIC_COLUMNS}
+            schema = pa.schema([(c, types.get(c, pa.string())) for c in REPORT_COLUMNS])
+            self._parquet = pq.ParquetWriter(self.paths["parquet"], schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close(footer=False)
+
+    def write(self, row: dict):
+        """Append one report row to every output."""
+        self.total += 1
+        self.passed += row.get("status") == "合规"
+        flat = {c: ReportGenerator.format_value(c, row.get(c, "")) for c in REPORT_COLUMNS}
+        if self._csv:
+            self._csv.writerow(flat)
+        if self._jsonl:
+            self._jsonl.write(json.dumps({c: row.get(c, "") for c in REPORT_COLUMNS}, ensure_ascii=False, default=str) + "\n")
+        if self._parquet:
+            self._parquet_rows.append({c: (None if v == "" else v) if c in NUMERIC_COLUMNS else str(v) for c, v in flat.items()})
+
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Push buffered rows to disk (Parquet gets one row group per flush)."""
+        if self._csv:
+            self._csv_file.flush()
+        if self._jsonl:
+            self._jsonl.flush()
+        if self._parquet and self._parquet_rows:
+            self._parquet.write_table(self._pa.Table.from_pylist(self._parquet_rows, schema=self._parquet.schema))
+            self._parquet_rows = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self, note: str = "", footer: bool = True) -> dict:
+        """Write the summary footer (unless disabled), close all outputs and return their paths."""
+        if footer:
+            summary = f"总计 {self.total} 个, 合规 {self.passed} 个, 不合规 {self.total - self.passed} 个"
+            if self._csv:
+                self._csv.writerow({})
+                self._csv.writerow({"filename": "汇总", "status": summary, "details": note,
+                                    "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+            if self._jsonl:
+                self._jsonl.write(json.dumps({"summary": {"total": self.total, "compliant": self.passed,
+                                                          "non_compliant": self.total - self.passed, "note": note}},
+                                             ensure_ascii=False) + "\n")
+        self.flush()
+        if self._csv:
+            self._csv_file.close()
+            self._csv = None
+        if self._jsonl:
+            self._jsonl.close()
+            self._jsonl = None
+        if self._parquet:
+            self._parquet.close()
+            self._parquet = None
+        return self.paths
 
 
 class ReportGenerator:
@@ -9,17 +134,35 @@ class ReportGenerator:
     @staticmethod
     def generate_csv(results: list[dict], output_path: str) -> str:
         """Generate CSV report from detection results."""
-        df = pd.DataFrame(results)
+        with ReportWriter(output_path, ("csv",)) as writer:
+            for row in results:
+                writer.write(row)
+        return writer.paths["csv"]
 
-        # Ensure required columns
-        columns = ["filename", "status", "violated_rules", "details", "checked_at"]
-        for col in columns:
-            if col not in df.columns:
-                df[col] = ""
+    @staticmethod
+    def format_value(column: str, value) -> str:
+        """Cell text for a report column."""
+        if column == "rule_times":
+            return ReportGenerator.format_rule_times(value)
+        if column == "rule_metrics":
+            return ReportGenerator.format_rule_metrics(value)
+        return "" if value is None else value
+
+    @staticmethod
+    def format_rule_times(rule_times) -> str:
+        """Per-rule seconds as "规则12=3.10s; 规则4=0.84s" (slowest first)."""
+        if not isinstance(rule_times, dict):
+            return ""
+        ordered = sorted(rule_times.items(), key=lambda kv: -kv[1])
+        return "; ".join(f"规则{rule_id}={seconds:.2f}s" for rule_id, seconds in ordered)
 
-        df = df[columns]
-        df.to_csv(output_path, index=False, encoding="utf-8-sig")
-        return output_path
+    @staticmethod
+    def format_rule_metrics(rule_metrics) -> str:
+        """Per-rule measurements as "规则12: static_ratio=0.95, loop_period=4.0"."""
+        if not isinstance(rule_metrics, dict):
+            return ""
+        return "; ".join(f"规则{rule_id}: " + ", ".join(f"{k}={v}" for k, v in values.items())
+                         for rule_id, values in rule_metrics.items())
 
     @staticmethod
     def create_result(
@@ -0,0 +1,116 @@
+"""Persistent content-addressed cache of VLM responses (SQLite)."""
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from config import VLM_CACHE_ENABLED, VLM_CACHE_FILE, VLM_CACHE_MAX_ENTRIES, VLM_CACHE_MAX_AGE
+
+
+class ResponseCache:
+    """Responses keyed on model, prompt and image hashes, with LRU/age eviction."""
+
+    EVICT_EVERY = 100  # Run eviction after this many inserts
+
+    def __init__(self, path: Path = VLM_CACHE_FILE, max_entries: int = VLM_CACHE_MAX_ENTRIES,
+                 max_age: float = VLM_CACHE_MAX_AGE, enabled: bool = VLM_CACHE_ENABLED):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._inserts = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, images_base64: list[str]) -> str:
+        """Content address of a request: model, prompt and a digest per image."""
+        h = hashlib.sha256()
+        for part in (model, prompt):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        for img in images_base64:
+            h.update(hashlib.sha256(img.encode("ascii")).digest())
+        return h.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Cached response or None; refreshes the entry's LRU timestamp."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.max_age and now - row[1] > self.max_age:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._inserts += 1
+            if self._inserts % self.EVICT_EVERY == 0:
+                self._evict(conn, now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0] if self.enabled else 0
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used beyond max_entries."""
+        if self.max_age:
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.max_age,))
+        if self.max_entries:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (caller holds the lock)."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, response TEXT, created REAL, used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+        return self._conn
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResponseCache()
+        return _shared
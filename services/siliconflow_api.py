@@ -1,61 +1,96 @@
-import requests
-from config import SILICONFLOW_API_KEY, SILICONFLOW_BASE_URL, SILICONFLOW_MODEL
+from config import SILICONFLOW_API_KEY, SILICONFLOW_BASE_URL, SILICONFLOW_MODEL, API_IMAGE_TOKEN_ESTIMATE, VLM_MAX_IMAGES
+from .transport import HTTPTransport, get_transport
+from .response_cache import ResponseCache, get_response_cache
+from .metrics import record
 
 
 class SiliconFlowClient:
     """SiliconFlow API client for vision model."""
 
-    def __init__(self, api_key: str = None, model: str = None):
+    MAX_TOKENS = 500
+
+    def __init__(self, api_key: str = None, model: str = None, transport: HTTPTransport = None,
+                 cache: ResponseCache = None, use_cache: bool = True):
         self.api_key = api_key or SILICONFLOW_API_KEY
         self.base_url = SILICONFLOW_BASE_URL
         self.model = model or SILICONFLOW_MODEL
+        self.transport = transport or get_transport()
+        self.cache = cache or get_response_cache()
+        self.use_cache = use_cache  # False bypasses cache reads and writes
 
     def analyze_image(self, image_base64: str, prompt: str) -> str:
         """Analyze image with vision model."""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        return self._complete(self._content(prompt, [image_base64]))
 
-        payload = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_base64}"}}
-                    ]
-                }
-            ],
-            "max_tokens": 500,
-            "temperature": 0
-        }
+    def analyze_images(self, images_base64: list[str], prompt: str) -> str:
+        """Analyze multiple images with vision model."""
+        return self._complete(self._content(prompt, images_base64[:VLM_MAX_IMAGES]))  # Callers pack extra frames into mosaics
 
-        resp = requests.post(f"{self.base_url}/chat/completions", headers=headers, json=payload, timeout=60)
-        resp.raise_for_status()
+    def chat(self, prompt: str) -> str:
+        """Text-only question to the model."""
+        return self._complete(self._content(prompt, []))
 
-        return resp.json()["choices"][0]["message"]["content"]
+    async def analyze_images_async(self, images_base64: list[str], prompt: str) -> str:
+        """Async variant of analyze_images for concurrent callers."""
+        return await self._complete_async(self._content(prompt, images_base64[:VLM_MAX_IMAGES]))
 
-    def analyze_images(self, images_base64: list[str], prompt: str) -> str:
-        """Analyze multiple images with vision model."""
+    async def chat_async(self, prompt: str) -> str:
+        """Async variant of chat."""
+        return await self._complete_async(self._content(prompt, []))
+
+    def _complete(self, content: list[dict]) -> str:
+        key = self._cache_key(content)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            record(cache_hits=1)
+            return cached
+        reply = self._reply(self.transport.post_json(*self._request(content)))
+        if key:
+            self.cache.put(key, reply)
+        return reply
+
+    async def _complete_async(self, content: list[dict]) -> str:
+        key = self._cache_key(content)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            record(cache_hits=1)
+            return cached
+        reply = self._reply(await self.transport.post_json_async(*self._request(content)))
+        if key:
+            self.cache.put(key, reply)
+        return reply
+
+    def _cache_key(self, content: list[dict]) -> str | None:
+        if not self.use_cache:
+            return None
+        images = [c["image_url"]["url"] for c in content if c["type"] == "image_url"]
+        return ResponseCache.make_key(self.model, content[0]["text"], images)
+
+    @staticmethod
+    def _content(prompt: str, images_base64: list[str]) -> list[dict]:
+        content = [{"type": "text", "text": prompt}]
+        for img in images_base64:
+            content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img}"}})
+        return content
+
+    def _request(self, content: list[dict]) -> tuple[str, dict, dict, int]:
+        """Build (url, payload, headers, estimated tokens) for a chat completion."""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
 
-        content = [{"type": "text", "text": prompt}]
-        for img in images_base64[:4]:  # Limit to 4 images
-            content.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img}"}})
-
         payload = {
             "model": self.model,
             "messages": [{"role": "user", "content": content}],
-            "max_tokens": 500,
+            "max_tokens": self.MAX_TOKENS,
             "temperature": 0
         }
 
-        resp = requests.post(f"{self.base_url}/chat/completions", headers=headers, json=payload, timeout=60)
-        resp.raise_for_status()
+        images = sum(1 for c in content if c["type"] == "image_url")
+        tokens = len(content[0]["text"]) + images * API_IMAGE_TOKEN_ESTIMATE + self.MAX_TOKENS
+        return f"{self.base_url}/chat/completions", payload, headers, tokens
 
-        return resp.json()["choices"][0]["message"]["content"]
+    @staticmethod
+    def _reply(data: dict) -> str:
+        return data["choices"][0]["message"]["content"]
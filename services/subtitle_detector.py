@@ -0,0 +1,57 @@
+"""Local lyric/subtitle detection in the lower band of a frame."""
+import cv2
+import numpy as np
+from config import SUBTITLE_BAND, SUBTITLE_TEXT_SCORE, SUBTITLE_BLANK_SCORE
+
+
+class SubtitleDetector:
+    """Find text lines by edge density: dense, short, horizontally aligned strokes.
+
+    score() is the width fraction of the widest text-like line in the band;
+    classify() maps it to True (text), False (blank) or None (ask the VLM).
+    """
+
+    WORK_WIDTH = 640  # Band is resized to this width before analysis
+
+    def __init__(self, band: tuple[float, float] = SUBTITLE_BAND,
+                 text_score: float = SUBTITLE_TEXT_SCORE, blank_score: float = SUBTITLE_BLANK_SCORE):
+        self.band = band
+        self.text_score = text_score
+        self.blank_score = blank_score
+
+    def score(self, frame: np.ndarray) -> float:
+        h, w = frame.shape[:2]
+        band = frame[int(h * self.band[0]):int(h * self.band[1])]
+        if band.size == 0:
+            return 0.0
+        gray = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY) if band.ndim == 3 else band
+        scale = self.WORK_WIDTH / w
+        gray = cv2.resize(gray, (self.WORK_WIDTH, max(1, int(gray.shape[0] * scale))), interpolation=cv2.INTER_AREA)
+        bh = gray.shape[0]
+
+        # Stroke edges: morphological gradient, binarized, then joined into lines
+        grad = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8))
+        if grad.max() < 40:
+            return 0.0  # Flat band: Otsu would split noise
+        _, edges = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        lines = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+
+        best = 0.0
+        contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for contour in contours:
+            x, y, cw, ch = cv2.boundingRect(contour)
+            if not (0.04 * bh <= ch <= 0.5 * bh) or cw < 2.5 * ch:
+                continue
+            density = np.count_nonzero(edges[y:y + ch, x:x + cw]) / (cw * ch)
+            if 0.15 <= density <= 0.8:  # Text is stroke-dense but not a solid block
+                best = max(best, cw / self.WORK_WIDTH)
+        return best
+
+    def classify(self, frame: np.ndarray) -> bool | None:
+        """True if a subtitle line is clearly present, False if clearly absent, else None."""
+        s = self.score(frame)
+        if s >= self.text_score:
+            return True
+        if s <= self.blank_score:
+            return False
+        return None
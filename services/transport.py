@@ -0,0 +1,120 @@
+"""Shared HTTP transport: keep-alive pooling, retries and client-side rate limits."""
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import requests
+from requests.adapters import HTTPAdapter
+from config import (
+    API_TIMEOUT, API_MAX_RETRIES, API_BACKOFF_BASE, API_BACKOFF_MAX,
+    API_POOL_SIZE, API_RPM_LIMIT, API_TPM_LIMIT,
+)
+from .metrics import record
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously; rate <= 0 disables it."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        """Block until `amount` tokens are available, then take them."""
+        if self.rate <= 0:
+            return
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HTTPTransport:
+    """Pooled session that retries 429/5xx with exponential backoff."""
+
+    def __init__(self, timeout: float = API_TIMEOUT, max_retries: int = API_MAX_RETRIES,
+                 pool_size: int = API_POOL_SIZE, rpm: int = API_RPM_LIMIT, tpm: int = API_TPM_LIMIT):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.requests_bucket = TokenBucket(rpm)
+        self.tokens_bucket = TokenBucket(tpm)
+
+    def post_json(self, url: str, payload: dict, headers: dict = None, tokens: int = 0) -> dict:
+        """POST JSON and return the decoded response, retrying transient failures."""
+        for attempt in range(self.max_retries + 1):
+            self.requests_bucket.acquire()
+            if tokens:
+                self.tokens_bucket.acquire(tokens)
+            try:
+                resp = self.session.post(url, headers=headers, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                record(api_calls=1)
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            record(api_calls=1, bytes_uploaded=len(resp.request.body or b""))
+
+            if resp.status_code in RETRY_STATUS and attempt < self.max_retries:
+                delay = self._retry_after(resp)
+                time.sleep(delay if delay is not None else self._backoff(attempt))
+                continue
+
+            resp.raise_for_status()
+            return resp.json()
+
+    async def post_json_async(self, url: str, payload: dict, headers: dict = None, tokens: int = 0) -> dict:
+        """Async variant; runs the pooled request in a worker thread."""
+        return await asyncio.to_thread(self.post_json, url, payload, headers, tokens)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        delay = min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _retry_after(resp: requests.Response) -> float | None:
+        """Parse Retry-After as seconds or an HTTP date."""
+        value = resp.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return min(API_BACKOFF_MAX, max(0.0, float(value)))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+            return min(API_BACKOFF_MAX, max(0.0, (when - datetime.now(timezone.utc)).total_seconds()))
+        except (TypeError, ValueError):
+            return None
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """Process-wide transport, so all clients share one pool and one rate limit."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HTTPTransport()
+        return _shared
@@ -0,0 +1,175 @@
+"""Typed video metadata with a shared ffprobe cache."""
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from config import PROBE_CACHE_FILE, PROBE_CACHE_PERSIST, PROBE_CACHE_MAX_ENTRIES, PROBE_KEYFRAME_WINDOW
+
+
+@dataclass
+class VideoInfo:
+    """Metadata of a video file as reported by ffprobe."""
+    width: int = 0
+    height: int = 0
+    duration: float = 0.0
+    codec: str = ""
+    fps: float = 0.0
+    bit_rate: int = 0
+    has_audio: bool = False
+    keyframe_interval: float = 0.0  # Mean seconds between keyframes in the probed window
+
+
+def _parse_rate(rate: str) -> float:
+    """Parse ffprobe frame rates like '30000/1001'."""
+    try:
+        num, _, den = rate.partition("/")
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def probe_video(video_path: str) -> VideoInfo | None:
+    """Run ffprobe once and parse streams, format and keyframe packets.
+
+    Keyframe packets are read for the first PROBE_KEYFRAME_WINDOW seconds
+    only: that is extra demuxing per probe, noticeable on network mounts.
+    """
+    cmd = [
+        "ffprobe", "-v", "quiet", "-print_format", "json",
+        "-show_format", "-show_streams",
+        "-show_entries", "packet=stream_index,pts_time,flags",
+        "-read_intervals", f"%+{PROBE_KEYFRAME_WINDOW}",
+        video_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, encoding='utf-8', errors='ignore')
+    if result.returncode != 0 or not result.stdout:
+        return None
+
+    data = json.loads(result.stdout)
+    streams = data.get("streams", [])
+    fmt = data.get("format", {})
+    video_stream = next((s for s in streams if s.get("codec_type") == "video"), {})
+
+    keyframes = [
+        float(p["pts_time"]) for p in data.get("packets", [])
+        if p.get("stream_index") == video_stream.get("index")
+        and "K" in p.get("flags", "") and p.get("pts_time") not in (None, "N/A")
+    ]
+    keyframes.sort()
+    gop = (keyframes[-1] - keyframes[0]) / (len(keyframes) - 1) if len(keyframes) > 1 else 0.0
+
+    return VideoInfo(
+        width=int(video_stream.get("width", 0)),
+        height=int(video_stream.get("height", 0)),
+        duration=float(fmt.get("duration", 0) or 0),
+        codec=video_stream.get("codec_name", ""),
+        fps=_parse_rate(video_stream.get("avg_frame_rate", "")) or _parse_rate(video_stream.get("r_frame_rate", "")),
+        bit_rate=int(fmt.get("bit_rate", 0) or 0),
+        has_audio=any(s.get("codec_type") == "audio" for s in streams),
+        keyframe_interval=gop,
+    )
+
+
+class VideoInfoCache:
+    """Memoize probes by path, invalidated when file size or mtime changes.
+
+    With a cache file, each new probe is also written to a small SQLite
+    table (one row per path, VideoInfo fields only), so later runs skip
+    ffprobe without loading the whole cache. Rows beyond max_entries are
+    evicted least recently used first.
+    """
+
+    EVICT_EVERY = 200  # Run eviction after this many inserts
+
+    def __init__(self, cache_file: Path = None, max_entries: int = PROBE_CACHE_MAX_ENTRIES):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[int, int, VideoInfo]] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._inserts = 0
+
+    def get(self, video_path: str) -> VideoInfo:
+        """Return cached metadata, probing only when the file changed."""
+        key = os.path.abspath(video_path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            return VideoInfo()
+
+        with self._lock:
+            entry = self._entries.get(key) or self._load(key)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+
+        info = probe_video(video_path)
+        if info is None:
+            return VideoInfo()
+
+        with self._lock:
+            self._entries[key] = (st.st_size, st.st_mtime_ns, info)
+            self._store(key, st.st_size, st.st_mtime_ns, info)
+        return info
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._connect():
+                self._conn.execute("DELETE FROM probes")
+
+    def _load(self, key: str) -> tuple[int, int, VideoInfo] | None:
+        """Probe row persisted by an earlier run (caller holds the lock)."""
+        conn = self._connect()
+        if not conn:
+            return None
+        try:
+            row = conn.execute("SELECT size, mtime, info FROM probes WHERE path = ?", (key,)).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE probes SET used = ? WHERE path = ?", (time.time(), key))
+            # Fields added or dropped since the row was written fall back to defaults
+            names = {f.name for f in fields(VideoInfo)}
+            info = VideoInfo(**{k: v for k, v in json.loads(row[2]).items() if k in names})
+            entry = self._entries[key] = (row[0], row[1], info)
+            return entry
+        except (sqlite3.Error, ValueError, TypeError):
+            return None
+
+    def _store(self, key: str, size: int, mtime: int, info: VideoInfo):
+        """Persist one probe and evict old rows now and then (caller holds the lock)."""
+        conn = self._connect()
+        if not conn:
+            return
+        try:
+            conn.execute("INSERT OR REPLACE INTO probes (path, size, mtime, info, used) VALUES (?, ?, ?, ?, ?)",
+                         (key, size, mtime, json.dumps(asdict(info)), time.time()))
+            self._inserts += 1
+            if self.max_entries and self._inserts % self.EVICT_EVERY == 0:
+                conn.execute("DELETE FROM probes WHERE path IN "
+                             "(SELECT path FROM probes ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        except sqlite3.Error:
+            pass  # The cache is an optimization; a locked or read-only file only costs re-probes
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Open the database on first use (caller holds the lock); None without persistence."""
+        if self._conn is None and self.cache_file:
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                self._conn = sqlite3.connect(str(self.cache_file), check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS probes "
+                    "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, info TEXT, used REAL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS probes_used ON probes (used)")
+            except (OSError, sqlite3.Error):
+                self.cache_file = None
+                self._conn = None
+        return self._conn
+
+
+VIDEO_INFO_CACHE = VideoInfoCache(PROBE_CACHE_FILE if PROBE_CACHE_PERSIST else None)
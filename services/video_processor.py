@@ -1,35 +1,23 @@
 import subprocess
-import base64
-import tempfile
-import json
-from pathlib import Path
 import cv2
 import numpy as np
+from config import (
+    FRAME_SEEK_GAP, FRAME_BATCH_INPUTS, FRAME_DEDUP_DISTANCE, MOSAIC_GRID, MOSAIC_TILE_SIZE,
+    AUDIO_CHUNK_DURATION, AUDIO_SAMPLE_RATE, AUDIO_LEVEL_MODE,
+    STATIC_PROFILE_FPS, STATIC_PROFILE_SIZE,
+)
+from .video_info import VideoInfo, VIDEO_INFO_CACHE
+from .frame_encoder import FRAME_ENCODER
+from .metrics import record
 
 
 class VideoProcessor:
     """Video processing utilities using FFmpeg and OpenCV."""
 
     @staticmethod
-    def get_video_info(video_path: str) -> dict:
-        """Get video metadata using ffprobe."""
-        cmd = [
-            "ffprobe", "-v", "quiet", "-print_format", "json",
-            "-show_format", "-show_streams", video_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, encoding='utf-8', errors='ignore')
-        if result.returncode != 0 or not result.stdout:
-            return {}
-
-        data = json.loads(result.stdout)
-        video_stream = next((s for s in data.get("streams", []) if s["codec_type"] == "video"), {})
-
-        return {
-            "width": int(video_stream.get("width", 0)),
-            "height": int(video_stream.get("height", 0)),
-            "duration": float(data.get("format", {}).get("duration", 0)),
-            "codec": video_stream.get("codec_name", ""),
-        }
+    def get_video_info(video_path: str) -> VideoInfo:
+        """Get video metadata (ffprobe, memoized on path+size+mtime)."""
+        return VIDEO_INFO_CACHE.get(video_path)
 
     @staticmethod
     def extract_frame(video_path: str, timestamp: float) -> np.ndarray | None:
@@ -38,17 +26,147 @@ class VideoProcessor:
         cap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
         ret, frame = cap.read()
         cap.release()
+        if ret:
+            record(frames_decoded=1)
         return frame if ret else None
 
     @staticmethod
-    def extract_frames(video_path: str, count: int = 5) -> list[np.ndarray]:
-        """Extract evenly distributed frames from video."""
+    def extract_frames_at(video_path: str, timestamps: list[float]) -> dict[float, np.ndarray | None]:
+        """Extract frames at several timestamps with one capture in a single forward pass."""
+        frames = {}
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return {ts: None for ts in timestamps}
+
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        pos = None  # Timestamp of the next frame the capture will return
+        for ts in sorted(set(timestamps)):
+            if pos is None or fps <= 0 or ts < pos or ts - pos > FRAME_SEEK_GAP:
+                cap.set(cv2.CAP_PROP_POS_MSEC, ts * 1000)
+            else:
+                # Close ahead: decode forward instead of reseeking the container
+                for _ in range(int((ts - pos) * fps)):
+                    if not cap.grab():
+                        break
+            ret, frame = cap.read()
+            frames[ts] = frame if ret else None
+            pos = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000 if ret else None
+        cap.release()
+        record(frames_decoded=sum(f is not None for f in frames.values()))
+        return frames
+
+    @staticmethod
+    def extract_frames_batch(video_path: str, timestamps: list[float],
+                             size: tuple[int, int] = None) -> dict[float, np.ndarray | None]:
+        """Extract frames at timestamps through one ffmpeg process, scaled to fit size.
+
+        Sparse timestamps are fetched with one input-seeking input each
+        (trimmed to a single frame and concatenated); dense ones with a frame
+        number select filter over a single decode. Frames arrive as raw BGR
+        and are read straight into one preallocated array. Timestamps that
+        could not be decoded map to None.
+        """
+        times = sorted(set(timestamps))
+        frames = {ts: None for ts in times}
         info = VideoProcessor.get_video_info(video_path)
-        duration = info.get("duration", 0)
+        if not times or not info.width or not info.height:
+            return frames
+
+        scale = min(size[0] / info.width, size[1] / info.height, 1) if size else 1
+        w, h = max(1, int(info.width * scale)), max(1, int(info.height * scale))
+        valid = [ts for ts in times if 0 <= ts < info.duration] if info.duration else times
+        # Each seek decodes about half a GOP; decoding straight through wins when samples are closer
+        gap_limit = info.keyframe_interval / 2 if info.keyframe_interval else FRAME_SEEK_GAP
+        dense = len(valid) > 1 and info.fps > 0 and (valid[-1] - valid[0]) / (len(valid) - 1) < gap_limit
+
+        groups = [valid] if dense else [valid[i:i + FRAME_BATCH_INPUTS] for i in range(0, len(valid), FRAME_BATCH_INPUTS)]
+        for group in groups:
+            if dense:
+                # Frame numbers count from the seek point, which is the first timestamp
+                start = group[0]
+                numbers = sorted({int(round((ts - start) * info.fps)) for ts in group})
+                cmd = VideoProcessor._select_command(video_path, start, group[-1] - start + 1, numbers, w, h)
+            else:
+                cmd = VideoProcessor._seek_command(video_path, group, w, h)
+            out = VideoProcessor._read_raw_frames(cmd, len(numbers) if dense else len(group), w, h)
+            if dense:
+                by_number = dict(zip(numbers, out))
+                for ts in group:
+                    frames[ts] = by_number.get(int(round((ts - start) * info.fps)))
+            elif len(out) == len(group):  # A short read cannot be attributed to timestamps
+                frames.update(zip(group, out))
+        return frames
+
+    @staticmethod
+    def _seek_command(video_path: str, times: list[float], w: int, h: int) -> list[str]:
+        """ffmpeg command taking the first frame after each seek point, one input per timestamp."""
+        cmd = ["ffmpeg", "-v", "error"]
+        for ts in times:
+            cmd += ["-ss", f"{ts:.3f}", "-i", video_path]
+        chains = [f"[{i}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS,scale={w}:{h}:flags=area,setsar=1[v{i}]"
+                  for i in range(len(times))]
+        joined = "".join(f"[v{i}]" for i in range(len(times)))
+        graph = ";".join(chains + [f"{joined}concat=n={len(times)}:v=1:a=0,format=bgr24[out]"])
+        return cmd + ["-filter_complex", graph, "-map", "[out]", "-fps_mode", "passthrough", "-f", "rawvideo", "pipe:1"]
+
+    @staticmethod
+    def _select_command(video_path: str, start: float, span: float, numbers: list[int], w: int, h: int) -> list[str]:
+        """ffmpeg command keeping the given frame numbers (counted from start) from a single decode."""
+        select = "+".join(f"eq(n\\,{n})" for n in numbers)
+        return [
+            "ffmpeg", "-v", "error", "-ss", f"{start:.3f}", "-t", f"{span:.3f}", "-i", video_path,
+            "-map", "0:v:0", "-an", "-sn", "-dn",
+            "-vf", f"select={select},scale={w}:{h}:flags=area,format=bgr24",
+            "-fps_mode", "passthrough", "-f", "rawvideo", "pipe:1",
+        ]
+
+    @staticmethod
+    def _read_raw_frames(cmd: list[str], count: int, w: int, h: int) -> list[np.ndarray]:
+        """Run cmd and read up to count bgr24 frames of w x h into one preallocated array."""
+        out = np.empty((count, h, w, 3), dtype=np.uint8)
+        buf = memoryview(out).cast("B")
+        filled = 0
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError:
+            return []
+        with proc:
+            while filled < len(buf):
+                n = proc.stdout.readinto(buf[filled:])
+                if not n:
+                    break
+                filled += n
+            proc.stdout.close()
+        count = filled // (w * h * 3)
+        record(frames_decoded=count)
+        return list(out[:count])
+
+    @staticmethod
+    def even_timestamps(duration: float, count: int = 5) -> list[float]:
+        """Timestamps of evenly distributed frames (excluding both ends)."""
         if duration <= 0:
             return []
+        return [duration * i / (count + 1) for i in range(1, count + 1)]
 
-        timestamps = [duration * i / (count + 1) for i in range(1, count + 1)]
+    @staticmethod
+    def first_timestamps(seconds: float = 10, count: int = 3) -> list[float]:
+        """Timestamps of evenly distributed frames in the first N seconds."""
+        return [seconds * i / (count + 1) for i in range(1, count + 1)]
+
+    @staticmethod
+    def fit_frame(frame: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+        """Downscale frame to fit within (max_w, max_h), keeping aspect ratio."""
+        h, w = frame.shape[:2]
+        scale = min(size[0] / w, size[1] / h)
+        if scale >= 1:
+            return frame
+        return cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+    @staticmethod
+    def extract_frames(video_path: str, count: int = 5) -> list[np.ndarray]:
+        """Extract evenly distributed frames from video."""
+        info = VideoProcessor.get_video_info(video_path)
+        timestamps = VideoProcessor.even_timestamps(info.duration, count)
         frames = []
         for ts in timestamps:
             frame = VideoProcessor.extract_frame(video_path, ts)
@@ -59,7 +177,7 @@ class VideoProcessor:
     @staticmethod
     def extract_first_frames(video_path: str, seconds: float = 10, count: int = 3) -> list[np.ndarray]:
         """Extract frames from first N seconds."""
-        timestamps = [seconds * i / (count + 1) for i in range(1, count + 1)]
+        timestamps = VideoProcessor.first_timestamps(seconds, count)
         frames = []
         for ts in timestamps:
             frame = VideoProcessor.extract_frame(video_path, ts)
@@ -68,35 +186,142 @@ class VideoProcessor:
         return frames
 
     @staticmethod
-    def frame_to_base64(frame: np.ndarray) -> str:
-        """Convert frame to base64 string."""
-        _, buffer = cv2.imencode(".jpg", frame)
-        return base64.b64encode(buffer).decode("utf-8")
+    def dhash(frame: np.ndarray, size: int = 8) -> int:
+        """Perceptual difference hash of a downscaled grayscale frame (size*size bits)."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+        bits = (small[:, 1:] > small[:, :-1]).flatten()
+        return int.from_bytes(np.packbits(bits).tobytes(), "big")
 
     @staticmethod
-    def extract_audio_levels(video_path: str) -> list[float]:
-        """Extract audio RMS levels using ffmpeg."""
-        with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
-            temp_path = f.name
+    def hash_distance(a: int, b: int) -> int:
+        """Hamming distance between two perceptual hashes."""
+        return (a ^ b).bit_count()
+
+    @staticmethod
+    def dedupe_frames(frames: list[np.ndarray], max_distance: int = FRAME_DEDUP_DISTANCE) -> tuple[list[np.ndarray], int]:
+        """Drop near-duplicate frames, keeping the first of each group.
+
+        Returns the kept frames (in order) and how many were dropped.
+        """
+        kept, hashes = [], []
+        for frame in frames:
+            h = VideoProcessor.dhash(frame)
+            if any(VideoProcessor.hash_distance(h, k) <= max_distance for k in hashes):
+                continue
+            kept.append(frame)
+            hashes.append(h)
+        return kept, len(frames) - len(kept)
+
+    @staticmethod
+    def make_mosaic(frames: list[np.ndarray], grid: tuple[int, int] = MOSAIC_GRID,
+                    tile_size: tuple[int, int] = MOSAIC_TILE_SIZE, start: int = 1) -> list[np.ndarray]:
+        """Tile frames into labelled grid images, numbering cells from `start`.
+
+        Each mosaic holds cols*rows frames in row-major order; every cell is
+        letterboxed to tile_size and carries its number in the top-left corner.
+        """
+        cols, rows = grid
+        tw, th = tile_size
+        per_mosaic = cols * rows
+        mosaics = []
+        for offset in range(0, len(frames), per_mosaic):
+            chunk = frames[offset:offset + per_mosaic]
+            used_rows = (len(chunk) + cols - 1) // cols
+            canvas = np.zeros((th * used_rows, tw * min(cols, len(chunk)), 3), dtype=np.uint8)
+            for i, frame in enumerate(chunk):
+                tile = VideoProcessor.fit_frame(frame, tile_size)
+                h, w = tile.shape[:2]
+                y = (i // cols) * th + (th - h) // 2
+                x = (i % cols) * tw + (tw - w) // 2
+                canvas[y:y + h, x:x + w] = tile
+
+                label = str(start + offset + i)
+                x0, y0 = (i % cols) * tw, (i // cols) * th
+                cv2.rectangle(canvas, (x0, y0), (x0 + 18 + 16 * len(label), y0 + 34), (0, 0, 0), -1)
+                cv2.putText(canvas, label, (x0 + 6, y0 + 26), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+                cv2.rectangle(canvas, (x0, y0), (x0 + tw - 1, y0 + th - 1), (255, 255, 255), 1)
+            mosaics.append(canvas)
+        return mosaics
 
+    @staticmethod
+    def frame_to_base64(frame: np.ndarray, profile: str = "default") -> str:
+        """Convert frame to base64 JPEG using an encode profile (see ENCODE_PROFILES)."""
+        return FRAME_ENCODER.encode(frame, profile)
+
+    @staticmethod
+    def frames_to_base64(frames: list[np.ndarray], profile: str = "default") -> list[str]:
+        """Convert frames for one request, downsizing them to fit VLM_MAX_REQUEST_BYTES."""
+        return FRAME_ENCODER.encode_batch(frames, profile)
+
+    @staticmethod
+    def extract_gray_profile(video_path: str, fps: float = STATIC_PROFILE_FPS,
+                             size: tuple[int, int] = STATIC_PROFILE_SIZE) -> np.ndarray:
+        """Whole video as small gray frames (N, h, w) uint8, decoded in one ffmpeg pass.
+
+        Sampling and scaling happen inside ffmpeg, so Python only receives a
+        few KB per second of video. An empty array means decoding failed.
+        """
+        w, h = size
         cmd = [
-            "ffmpeg", "-i", video_path, "-af",
-            "astats=metadata=1:reset=1,ametadata=print:key=lavfi.astats.Overall.RMS_level:file=" + temp_path,
-            "-f", "null", "-"
+            "ffmpeg", "-v", "error",
+            # Cheap decode: drop non-reference frames and deblocking, both invisible at this size
+            "-skip_frame", "noref", "-skip_loop_filter", "all", "-flags2", "fast",
+            "-i", video_path,
+            "-map", "0:v:0", "-an", "-sn", "-dn",
+            "-vf", f"fps={fps},scale={w}:{h}:flags=area,format=gray",
+            "-f", "rawvideo", "pipe:1",
         ]
-        subprocess.run(cmd, capture_output=True)
+        try:
+            data = subprocess.run(cmd, capture_output=True).stdout
+        except OSError:
+            return np.empty((0, h, w), dtype=np.uint8)
+        n = len(data) // (w * h)
+        record(frames_decoded=n)
+        return np.frombuffer(data[:n * w * h], dtype=np.uint8).reshape(n, h, w)
 
-        levels = []
+    @staticmethod
+    def extract_audio_levels(video_path: str, window: float = AUDIO_CHUNK_DURATION,
+                             mode: str = AUDIO_LEVEL_MODE) -> np.ndarray:
+        """Per-window audio level in dB, streamed from ffmpeg as raw PCM.
+
+        Only the first audio stream is decoded (downmixed to mono and resampled
+        to AUDIO_SAMPLE_RATE). mode "rms" gives RMS dBFS; "lufs" applies an
+        approximate K-weighting in the decoder and reports LUFS-style loudness.
+        Silent windows are -inf; an empty array means no audio.
+        """
+        cmd = [
+            "ffmpeg", "-v", "error", "-i", video_path,
+            "-map", "0:a:0", "-vn", "-sn", "-dn",
+            "-ac", "1", "-ar", str(AUDIO_SAMPLE_RATE),
+        ]
+        if mode == "lufs":
+            cmd += ["-af", "highpass=f=38:poles=2,treble=g=4:f=1681"]
+        cmd += ["-f", "f32le", "pipe:1"]
+
+        win = max(1, int(AUDIO_SAMPLE_RATE * window))
+        win_bytes = win * 4
+        read_bytes = win_bytes * 16  # Read 16 windows at a time
+        chunks, pending = [], b""
         try:
-            with open(temp_path, "r") as f:
-                for line in f:
-                    if "RMS_level" in line:
-                        val = line.split("=")[-1].strip()
-                        if val != "-inf":
-                            levels.append(float(val))
-        except:
-            pass
-        finally:
-            Path(temp_path).unlink(missing_ok=True)
-
-        return levels
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        except OSError:
+            return np.empty(0)
+        with proc:
+            while True:
+                data = proc.stdout.read(read_bytes)
+                if not data:
+                    break
+                pending += data
+                n = len(pending) // win_bytes
+                if n:
+                    samples = np.frombuffer(pending[:n * win_bytes], dtype=np.float32).reshape(n, win)
+                    chunks.append(np.mean(np.square(samples, dtype=np.float64), axis=1))
+                    pending = pending[n * win_bytes:]
+
+        if not chunks:
+            return np.empty(0)
+        power = np.concatenate(chunks)
+        with np.errstate(divide="ignore"):
+            levels = 10 * np.log10(power)
+        return levels - 0.691 if mode == "lufs" else levels
@@ -0,0 +1,87 @@
+"""Hot-folder watch mode: poll stat snapshots and hand over files once they stop changing."""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+from config import WATCH_INTERVAL, WATCH_SETTLE
+from utils.file_utils import iter_video_files
+
+
+class FolderWatcher:
+    """Endless stream of video files that appear under a folder, for BatchPipeline.run().
+
+    Every WATCH_INTERVAL seconds the folder is rescanned and each video's
+    (size, mtime) is compared with the previous snapshot. A file is handed
+    over once it is non-empty and unchanged for WATCH_SETTLE seconds, so
+    uploads still being copied are left alone. Each (path, size, mtime) is
+    handed over once; a replaced file counts as new. Pure polling, no
+    platform-specific notification API. Iteration blocks while the pipeline's
+    bounded queues are full, which caps in-flight work during bursts.
+    """
+
+    def __init__(self, path: str, interval: float = WATCH_INTERVAL, settle: float = WATCH_SETTLE,
+                 existing: bool = True, **scan_options):
+        self.path = path
+        self.interval = interval
+        self.settle = settle
+        self.existing = existing  # Also hand over files already present at start
+        self.scan_options = scan_options  # iter_video_files() options (include, exclude, max_depth, skip_dirs)
+        self.found = 0
+        self.finished = False
+        self._stop = threading.Event()
+
+    def stop(self):
+        """End the stream after the current poll; files already handed over still finish."""
+        self._stop.set()
+
+    def snapshot(self) -> dict[str, tuple[int, int]]:
+        """path -> (size, mtime_ns) for every video currently under the folder."""
+        snap = {}
+        for f in iter_video_files(self.path, **self.scan_options):
+            try:
+                st = os.stat(f)
+            except OSError:
+                continue  # Moved or deleted mid-scan
+            snap[str(f)] = (st.st_size, st.st_mtime_ns)
+        return snap
+
+    @staticmethod
+    def _changed(path: str, sig: tuple) -> bool:
+        """Re-stat right before handing over; the snapshot may be stale after a long blocking hand-over."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return True
+        return (st.st_size, st.st_mtime_ns) != sig
+
+    def __iter__(self) -> Iterator[Path]:
+        pending = {}  # path -> (size, mtime_ns, monotonic time first seen with that signature)
+        seen = {}  # path -> (size, mtime_ns) already handed over
+        if not self.existing:
+            seen = self.snapshot()
+
+        while not self._stop.is_set():
+            now = time.monotonic()
+            snap = self.snapshot()
+            # Forget files that are gone (moved to an output folder, deleted) to keep memory bounded
+            seen = {p: sig for p, sig in seen.items() if p in snap}
+            pending = {p: v for p, v in pending.items() if p in snap}
+
+            for path, sig in snap.items():
+                if seen.get(path) == sig:
+                    continue
+                first = pending.get(path)
+                if first is None or first[:2] != sig:
+                    first = pending[path] = (*sig, now)  # New or still changing: restart the settle timer
+                if sig[0] == 0 or now - first[2] < self.settle or self._changed(path, sig):
+                    continue
+                del pending[path]
+                seen[path] = sig
+                self.found += 1
+                yield Path(path)  # Blocks while the pipeline is saturated
+                if self._stop.is_set():
+                    break
+
+            self._stop.wait(self.interval)
+        self.finished = True
@@ -0,0 +1,20 @@
+"""Batch metrics over report rows."""
+from services.metrics import BatchMetrics
+
+
+def test_error_rows_are_counted_apart_from_checked_videos():
+    metrics = BatchMetrics()
+    metrics.add({"status": "合规", "wall_time": 4.0, "api_calls": 3, "rule_times": {2: 1.0}})
+    metrics.add({"status": "不合规", "violated_rules": "检测异常", "error": True})
+
+    assert metrics.videos == 1 and metrics.errors == 1
+    assert metrics.summary_line().startswith("⏱ 平均 4.0s/个")
+    assert "检测异常 1 个" in metrics.summary_line()
+    assert "mvguard_videos_total 1\n" in metrics.prometheus_text()
+    assert "mvguard_errors_total 1\n" in metrics.prometheus_text()
+
+
+def test_all_errors_summary():
+    metrics = BatchMetrics()
+    metrics.add({"status": "不合规", "violated_rules": "检测异常", "error": True})
+    assert metrics.summary_line() == "⚠️ 检测异常 1 个"
@@ -0,0 +1,96 @@
+"""Resuming a batch from the journal: restored rows and batch metrics."""
+from checkers.base import CheckResult
+from services.journal import BatchJournal
+from services.metrics import BatchMetrics
+from services.pipeline import BatchPipeline
+from services.report_generator import ReportGenerator
+
+
+class FakeChecker:
+    """Minimal stand-in for MVComplianceChecker: metadata-only rules, no media."""
+
+    checkers = local_checkers = vlm_checkers = []
+
+    def __init__(self, rules=(11,), run="first", fail_fast=False):
+        self.rule_fingerprints = {rule_id: f"rule{rule_id}" for rule_id in rules}
+        self.fingerprint = f"{sorted(rules)}:{fail_fast}"
+        self.run = run  # Tags the results this checker produces
+        self.checked = []
+
+    def run_prechecks(self, video_path):
+        self.checked.append(video_path)
+        return [CheckResult(rule_id, f"规则{rule_id}", True, self.run) for rule_id in self.rule_fingerprints]
+
+    def stop_early(self, results):
+        return False
+
+    def pending(self, checkers, results):
+        return []
+
+    def plan_media(self, video_path, checkers=None):
+        return {}
+
+    def run_checkers(self, video_path, checkers, media, prior=()):
+        return []
+
+    def verdict(self, video_path, results, meter=None):
+        report = ReportGenerator.create_result(video_path, True, [], "通过所有检测")
+        report.update(meter.as_dict())
+        report.update(api_calls=2, rule_times={r.rule_id: 0.5 for r in results}, rule_metrics={12: {"static_ratio": 0.2}})
+        report["details"] = ", ".join(f"{r.rule_id}:{r.reason}" for r in sorted(results, key=lambda r: r.rule_id))
+        return report
+
+
+def run_batch(paths, journal, checker):
+    metrics = BatchMetrics()
+    for row in BatchPipeline(checker, journal=journal).run(paths):
+        metrics.add(row)
+    return metrics
+
+
+def test_resume_restores_rows_without_double_counting(tmp_path):
+    old, new = tmp_path / "a-b.mp4", tmp_path / "c-d.mp4"
+    old.write_bytes(b"old")
+    journal = BatchJournal(tmp_path / "journal.sqlite")
+
+    first = run_batch([old], journal, FakeChecker())
+    assert first.totals.api_calls == 2
+
+    # Second run: the judged file is restored, only the new one is checked
+    new.write_bytes(b"new")
+    checker = FakeChecker()
+    metrics = run_batch([old, new], journal, checker)
+
+    assert checker.checked == [str(new)]
+    state, report = journal.report(BatchJournal.identity(str(old)))
+    assert report["rule_times"] == {11: 0.5}
+    assert report["rule_metrics"] == {12: {"static_ratio": 0.2}}
+    assert metrics.videos == 1 and metrics.restored == 1
+    assert metrics.totals.api_calls == 2
+    assert 'mvguard_rule_seconds_total{rule="11"} 0.500' in metrics.prometheus_text()
+    assert "续检复用 1 个" in metrics.summary_line()
+
+
+def test_changed_rule_set_is_checked_again(tmp_path):
+    video = tmp_path / "a-b.mp4"
+    video.write_bytes(b"video")
+    identity = BatchJournal.identity(str(video))
+    journal = BatchJournal(tmp_path / "journal.sqlite")
+    run_batch([video], journal, FakeChecker(rules=(11,)))
+
+    # More rules: not restored; rule 11 is reused, rule 2 runs
+    checker = FakeChecker(rules=(2, 11), run="second")
+    metrics = run_batch([video], journal, checker)
+    assert checker.checked == [str(video)] and metrics.restored == 0
+    assert journal.report(identity)[1]["details"] == "2:second, 11:first"
+
+    # A disabled rule is no longer part of the verdict
+    run_batch([video], journal, FakeChecker(rules=(2,), run="third"))
+    assert journal.report(identity)[1]["details"] == "2:second"
+
+    # Same rules in full-audit mode: the verdict is made again
+    checker = FakeChecker(rules=(2,), fail_fast=True)
+    run_batch([video], journal, checker)
+    assert checker.checked == [str(video)]
+    assert journal.report(identity, checker.fingerprint) is not None
+    assert journal.report(identity, FakeChecker(rules=(2,)).fingerprint) is None
@@ -1,3 +1,3 @@
-from .file_utils import move_file, get_video_files, ensure_dir
+from .file_utils import move_file, get_video_files, iter_video_files, VideoScan, ensure_dir
 
-__all__ = ["move_file", "get_video_files", "ensure_dir"]
+__all__ = ["move_file", "get_video_files", "iter_video_files", "VideoScan", "ensure_dir"]
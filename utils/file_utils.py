@@ -1,7 +1,10 @@
 import os
 import shutil
+from fnmatch import fnmatchcase
+from itertools import chain
 from pathlib import Path
-from config import SUPPORTED_FORMATS
+from typing import Iterator
+from config import SUPPORTED_FORMATS, DISCOVERY_MAX_DEPTH, DISCOVERY_EXCLUDE
 
 
 def ensure_dir(path: str) -> Path:
@@ -12,17 +15,90 @@ def ensure_dir(path: str) -> Path:
 
 
 def get_video_files(path: str) -> list[Path]:
-    """Get all video files from path (file or directory)."""
-    p = Path(path)
-    if p.is_file() and p.suffix.lower() in SUPPORTED_FORMATS:
-        return [p]
-    if p.is_dir():
-        files = []
-        for fmt in SUPPORTED_FORMATS:
-            files.extend(p.glob(f"*{fmt}"))
-            files.extend(p.glob(f"*{fmt.upper()}"))
-        return sorted(set(files))  # 去重，避免大小写不敏感文件系统重复匹配
-    return []
+    """Get all video files from path (file or directory), sorted."""
+    return sorted(iter_video_files(path))
+
+
+def _matches(name: str, rel: str, patterns) -> bool:
+    """Case-insensitive glob match against the entry name or its path relative to the scan root."""
+    name, rel = name.lower(), rel.lower()
+    return any(fnmatchcase(name, p) or fnmatchcase(rel, p) for p in patterns)
+
+
+def iter_video_files(path: str, include=(), exclude=DISCOVERY_EXCLUDE, max_depth: int | None = DISCOVERY_MAX_DEPTH,
+                     skip_dirs=()) -> Iterator[Path]:
+    """Yield video files under path as they are found (one os.scandir pass per folder).
+
+    Suffixes match case-insensitively. ``include`` patterns, when given,
+    limit which files are yielded; ``exclude`` patterns prune files and whole
+    folders. Patterns are globs matched against the name or the path relative
+    to ``path``. Folders in ``skip_dirs`` (e.g. the output folders) and
+    symlinked folders are not entered; unreadable folders are skipped.
+    """
+    suffixes = tuple(fmt.lower() for fmt in SUPPORTED_FORMATS)
+    include = [p.lower() for p in include]
+    exclude = [p.lower() for p in exclude]
+    root = Path(path)
+    if root.is_file():
+        if root.name.lower().endswith(suffixes):
+            yield root
+        return
+    if not root.is_dir():
+        return
+
+    skip = {os.path.realpath(d) for d in skip_dirs}
+    stack = [(str(root), "", 0)]
+    while stack:
+        folder, rel_folder, depth = stack.pop()
+        subfolders = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    rel = f"{rel_folder}{entry.name}"
+                    if exclude and _matches(entry.name, rel, exclude):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if (max_depth is None or depth < max_depth) and os.path.realpath(entry.path) not in skip:
+                                subfolders.append((entry.path, f"{rel}/", depth + 1))
+                        elif entry.name.lower().endswith(suffixes) and entry.is_file():
+                            if not include or _matches(entry.name, rel, include):
+                                yield Path(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        stack.extend(reversed(subfolders))  # Depth-first, subfolders in directory order
+
+
+def source_folder(input_path: str) -> Path:
+    """Folder the default output folders are created in: the input folder, or a file's parent."""
+    p = Path(input_path)
+    return p if p.is_dir() else p.parent
+
+
+class VideoScan:
+    """Single-use stream over iter_video_files() that counts files as they are found.
+
+    The first file is looked up on creation, so an empty input is known
+    before any work starts; ``found`` is final once ``finished`` is set.
+    """
+
+    def __init__(self, path: str, **options):
+        self.found = 0
+        self.finished = False
+        self._files = iter_video_files(path, **options)
+        self._first = next(self._files, None)
+
+    def __bool__(self) -> bool:
+        return self._first is not None
+
+    def __iter__(self) -> Iterator[Path]:
+        files = chain([self._first], self._files) if self._first is not None else ()
+        for f in files:
+            self.found += 1
+            yield f
+        self.finished = True
 
 
 def move_file(src: str, dest_dir: str) -> str: